@@ -1,8 +1,19 @@
+from abc import ABC, abstractmethod
+from array import array
 from collections import defaultdict
-from math import sqrt
+from math import hypot, sqrt
 from prioritymap import prioritymap
-from typing import Callable, Iterable, Optional
-from ui import Coord, conv_coord, Number, Point
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TYPE_CHECKING
+import heapq
+import itertools
+
+if TYPE_CHECKING:
+    # concurrent.futures is slow to import and only needed by callers that pass an executor
+    from concurrent.futures import Executor, Future
+    from eventlog import SearchLog
+    # NumPy is only imported when a batch is large enough to need it
+    import numpy as np
+from geometry import Coord, conv_coord, Number, Point
 
 
 def distance(c1: Coord, c2: Coord) -> Number:
@@ -17,9 +28,278 @@ def distance(c1: Coord, c2: Coord) -> Number:
         A Number representing the euclidean distance between these two points.
     """
 
-    p1 = conv_coord(c1)
-    p2 = conv_coord(c2)
-    return sqrt((p1.x - p2.x) ** 2 + (p1.y - p2.y) ** 2)
+    if not isinstance(c1, Point):
+        c1 = Point(c1[0], c1[1])
+    if not isinstance(c2, Point):
+        c2 = Point(c2[0], c2[1])
+    return hypot(c1.x - c2.x, c1.y - c2.y)
+
+
+class Metric(ABC):
+    """A distance function between two Points that can also score many Points at once.
+    Unlike distance(), metrics do not accept (Number, Number) tuples, so they skip the conversion to Point.
+
+    Planners check for the batch() method and use it to score all the neighbors of a node in a single call.
+    """
+
+    # below this many points a plain loop beats building NumPy arrays
+    batch_threshold = 16
+
+    @abstractmethod
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        """Returns the distance between two Points."""
+
+    @abstractmethod
+    def kernel(self, dx: "np.ndarray", dy: "np.ndarray") -> "np.ndarray":
+        """Returns the distances for arrays of absolute x and y differences."""
+
+    def batch(self, origin: Point, points: Sequence[Point]) -> Sequence[Number]:
+        """Returns the distance from origin to each of the given Points, in order."""
+
+        if len(points) < self.batch_threshold:
+            return [self(origin, p) for p in points]
+        import numpy as np
+
+        coords = np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2)
+        return self.kernel(np.abs(coords[:, 0] - origin.x), np.abs(coords[:, 1] - origin.y)).tolist()
+
+    def to(self, goal: Coord) -> "GoalHeuristic":
+        """Returns a heuristic that measures the distance from a Point to the goal using this metric."""
+
+        return GoalHeuristic(self, conv_coord(goal))
+
+
+class Euclidean(Metric):
+    """Straight-line distance. Admissible for any-angle movement."""
+
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        return hypot(p1.x - p2.x, p1.y - p2.y)
+
+    def kernel(self, dx: "np.ndarray", dy: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        return np.hypot(dx, dy)
+
+
+class Octile(Metric):
+    """Distance when moving in 8 directions with diagonal steps costing sqrt(2)."""
+
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        dx = abs(p1.x - p2.x)
+        dy = abs(p1.y - p2.y)
+        return max(dx, dy) + (sqrt(2) - 1) * min(dx, dy)
+
+    def kernel(self, dx: "np.ndarray", dy: "np.ndarray") -> "np.ndarray":
+        import numpy as np
+
+        return np.maximum(dx, dy) + (sqrt(2) - 1) * np.minimum(dx, dy)
+
+
+class Manhattan(Metric):
+    """Distance when moving in 4 directions."""
+
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        return abs(p1.x - p2.x) + abs(p1.y - p2.y)
+
+    def kernel(self, dx: "np.ndarray", dy: "np.ndarray") -> "np.ndarray":
+        return dx + dy
+
+
+class GoalHeuristic:
+    """A heuristic measuring the distance from a Point to a fixed goal with a Metric.
+    Like Metric, it has a batch() method that planners use to score many Points at once.
+    """
+
+    def __init__(self, metric: Metric, goal: Point):
+        """
+        Args:
+            metric (Metric): The metric to measure with.
+            goal (Point): The destination.
+        """
+
+        self.metric = metric
+        self.goal = goal
+
+    def __call__(self, point: Point) -> Number:
+        return self.metric(point, self.goal)
+
+    def batch(self, points: Sequence[Point]) -> Sequence[Number]:
+        """Returns the estimate for each of the given Points, in order."""
+
+        return self.metric.batch(self.goal, points)
+
+
+euclidean = Euclidean()
+octile = Octile()
+manhattan = Manhattan()
+
+
+def _distances(get_distance: Callable[[Point, Point], Number], origin: Point, points: List[Point]) -> Sequence[Number]:
+    batch = getattr(get_distance, "batch", None)
+    if batch is not None:
+        return batch(origin, points)
+    return [get_distance(origin, p) for p in points]
+
+
+def _estimates(heuristic: Callable[[Point], Number], points: List[Point]) -> Sequence[Number]:
+    batch = getattr(heuristic, "batch", None)
+    if batch is not None:
+        return batch(points)
+    return [heuristic(p) for p in points]
+
+
+class _NeighborPrefetcher:
+    """Wraps a neighbor function so that the neighbors of nodes near the front of the frontier are computed ahead of time on an Executor.
+    Neighbors only depend on the node, so the planner still expands nodes one at a time in priority order and returns the same path it would serially.
+    """
+
+    def __init__(self, get_neighbors: Callable[[Point], Iterable[Point]], executor: "Executor", depth: int):
+        self.__get_neighbors = get_neighbors
+        self.__executor = executor
+        self.__depth = depth
+        self.__pending: Dict[Point, "Future"] = {}
+
+    def prefetch(self, to_search: prioritymap, skip: Collection[Point]) -> None:
+        """Submits the nodes at the front of the frontier that are not in skip and not already submitted."""
+
+        submitted = 0
+        for nodes in to_search.head(self.__depth):
+            for node in nodes:
+                if submitted >= self.__depth:
+                    break
+                if node not in self.__pending and node not in skip:
+                    self.__pending[node] = self.__executor.submit(self.__get_neighbors, node)
+                    submitted += 1
+
+        # nodes that fell back in the frontier may never be expanded, so forget the oldest ones
+        while len(self.__pending) > 4 * self.__depth:
+            self.__pending.pop(next(iter(self.__pending))).cancel()
+
+    def close(self) -> None:
+        """Cancels every prefetch that has not started yet. Call this when the search ends."""
+
+        for future in self.__pending.values():
+            future.cancel()
+        self.__pending.clear()
+
+    def __call__(self, node: Point) -> Iterable[Point]:
+        future = self.__pending.pop(node, None)
+        if future is None or future.cancelled():
+            return self.__get_neighbors(node)
+        return future.result()
+
+
+class Path:
+    """A path between two points, stored compactly as arrays of x and y coordinates.
+    Points are only created when the path is iterated or indexed.
+
+    Attributes:
+        cost (Number): The cost of the path. If it was not given, this is its euclidean length.
+    """
+
+    def __init__(self, points: Iterable[Coord] = (), cost: Optional[Number] = None):
+        """Constructs a Path out of several coordinates.
+
+        Args:
+            points (Iterable[Coord]): The coordinates in order.
+            cost (Optional[Number]): The cost of the path, or None to use its euclidean length.
+        """
+
+        xs, ys = [], []
+        for point in points:
+            xs.append(point[0])
+            ys.append(point[1])
+        self.__set(xs, ys, cost)
+
+    @classmethod
+    def _from_coords(cls, xs: List[Number], ys: List[Number], cost: Optional[Number] = None) -> "Path":
+        path = cls.__new__(cls)
+        path.__set(xs, ys, cost)
+        return path
+
+    def __set(self, xs: List[Number], ys: List[Number], cost: Optional[Number]) -> None:
+        typecode = "q" if all(type(c) is int for c in itertools.chain(xs, ys)) else "d"
+        self.__xs = array(typecode, xs)
+        self.__ys = array(typecode, ys)
+        self.__cost = cost
+
+    @property
+    def cost(self) -> Number:
+        if self.__cost is None:
+            xs, ys = self.__xs, self.__ys
+            self.__cost = sum(hypot(xs[i + 1] - xs[i], ys[i + 1] - ys[i]) for i in range(len(xs) - 1))
+        return self.__cost
+
+    def __len__(self) -> int:
+        """Returns the number of points in the path."""
+
+        return len(self.__xs)
+
+    def __getitem__(self, index: int) -> Point:
+        return Point(self.__xs[index], self.__ys[index])
+
+    def __iter__(self) -> Iterator[Point]:
+        for x, y in zip(self.__xs, self.__ys):
+            yield Point(x, y)
+
+    def __reversed__(self) -> Iterator[Point]:
+        for x, y in zip(reversed(self.__xs), reversed(self.__ys)):
+            yield Point(x, y)
+
+    def edges(self) -> Iterator[Tuple[Point, Point]]:
+        """Yields each pair of consecutive points in the path."""
+
+        points = iter(self)
+        prev = next(points, None)
+        for point in points:
+            yield prev, point
+            prev = point
+
+    def turning_points(self) -> "Path":
+        """Returns the same path with the points in the middle of straight runs removed.
+        A grid path becomes the list of points where it changes direction.
+        """
+
+        xs, ys = self.__xs, self.__ys
+        if len(xs) < 3:
+            return Path._from_coords(list(xs), list(ys), self.__cost)
+
+        out_x, out_y = [xs[0]], [ys[0]]
+        for i in range(1, len(xs) - 1):
+            if (xs[i] - out_x[-1]) * (ys[i + 1] - out_y[-1]) != (ys[i] - out_y[-1]) * (xs[i + 1] - out_x[-1]):
+                out_x.append(xs[i])
+                out_y.append(ys[i])
+        out_x.append(xs[-1])
+        out_y.append(ys[-1])
+        return Path._from_coords(out_x, out_y, self.__cost)
+
+    def smooth(self, line_of_sight: Callable[[Point, Point], bool]) -> "Path":
+        """Pulls the path taut (string pulling).
+        Each point is connected to the furthest later point it can see, skipping the points in between.
+
+        Args:
+            line_of_sight (Callable[[Point, Point], bool]): Returns True if a straight line between two points is unobstructed.
+
+        Returns:
+            A new Path whose cost is its euclidean length.
+        """
+
+        points = list(self.turning_points())
+        if len(points) < 3:
+            return Path(points)
+
+        out = [points[0]]
+        for i in range(1, len(points) - 1):
+            if not line_of_sight(out[-1], points[i + 1]):
+                out.append(points[i])
+        out.append(points[-1])
+        return Path(out)
+
+    def __str__(self) -> str:
+        return " -> ".join(str(x) for x in self)
+
+    def __repr__(self) -> str:
+        return "Path(" + ", ".join(str(x) for x in self) + ")"
 
 
 def a_star(start: Coord,
@@ -27,8 +307,11 @@ def a_star(start: Coord,
            get_neighbors: Callable[[Point], Iterable[Point]],
            get_distance: Callable[[Point, Point], Number] = distance,
            heuristic: Callable[[Point], Number] = lambda point: 0,
-           callback: Optional[Callable[[Iterable[Point]], None]] = None,
-           max_cost: Optional[Number] = None) -> Optional[Iterable[Point]]:
+           callback: Optional[Callable[[Path], None]] = None,
+           max_cost: Optional[Number] = None,
+           executor: Optional["Executor"] = None,
+           prefetch: int = 8,
+           log: Optional["SearchLog"] = None) -> Optional[Path]:
     """
     Returns a path between the start and end points.
     This will always be the shortest path as long as the heuristic does not overestimate the cost between two points.
@@ -47,6 +330,7 @@ def a_star(start: Coord,
         get_distance (Callable[[Point, Point], Number]):
             A function that computes the cost to travel between two given Points
             By default this is the distance formula.
+            If this is a Metric (e.g. euclidean), all of a node's neighbors are scored in one batch.
 
         heuristic (Callable[[Point], Number]):
             A function that estimates the cost from a point to the destination.
@@ -54,17 +338,44 @@ def a_star(start: Coord,
             Higher heuristics find a destination faster, but the path will be less optimal.
             By default this is a function that always returns 0.
 
-        callback (Optional[Callable[[Iterable[Point]], None]]:
+        callback (Optional[Callable[[Path], None]]:
             A callback that is called with every path this algorithm explores, or None to not use one.
             If this is not None, the algorithm will run slowly as the algorithm has to build
 
+        max_cost (Optional[Number]):
+            Points whose cost plus heuristic exceeds this are not searched, or None to search everything.
+
+        executor (Optional[Executor]):
+            An Executor used to compute the neighbors of the nodes at the front of the frontier ahead of time, or None to compute them serially.
+            A ThreadPoolExecutor helps when get_neighbors releases the GIL (e.g. NumPy calls).
+            A ProcessPoolExecutor works for pure-Python neighbor functions, but get_neighbors must then be picklable (a module-level function, not a lambda).
+            The path returned is the same as without an executor.
+
+        prefetch (int):
+            How many frontier nodes to compute neighbors for ahead of time when an executor is given.
+
+        log (Optional[SearchLog]):
+            A SearchLog that every expansion and the solution are written to, to be watched later with replay.py, or None to not log.
+            Unlike callback, this is cheap enough to leave on.
+
     Returns:
-         An Iterable of points representing the path from start to end, or None if no path could be found.
+         A Path from start to end, or None if no path could be found.
     """
 
-    start = conv_coord(start)
-    end = conv_coord(end)
+    return _a_star(conv_coord(start), {conv_coord(end)}, get_neighbors, get_distance, heuristic, callback, max_cost, executor, prefetch, log)
+
 
+def _a_star(start: Point,
+            goals: Collection[Point],
+            get_neighbors: Callable[[Point], Iterable[Point]],
+            get_distance: Callable[[Point, Point], Number],
+            heuristic: Callable[[Point], Number],
+            callback: Optional[Callable[[Path], None]],
+            max_cost: Optional[Number],
+            executor: Optional["Executor"],
+            prefetch: int,
+            log: Optional["SearchLog"]) -> Optional[Path]:
+    # a_star, stopping at whichever of the goals is reached first
     to_search = prioritymap()
     searched = set()
 
@@ -77,16 +388,163 @@ def a_star(start: Coord,
 
     to_search[cost_with_heuristic[start]] = {start}
 
-    def build_path(p: Point) -> Iterable[Point]:
-        path = []
+    prefetcher = _NeighborPrefetcher(get_neighbors, executor, prefetch) if executor is not None else None
+    if prefetcher:
+        get_neighbors = prefetcher
+
+    def build_path(p: Point) -> Path:
+        xs, ys = [], []
         tmp = p
         while tmp != start:
-            path.append(tmp)
+            xs.append(tmp.x)
+            ys.append(tmp.y)
             tmp = prev[tmp]
-        path.append(start)
-        return reversed(path)
+        xs.append(start.x)
+        ys.append(start.y)
+        xs.reverse()
+        ys.reverse()
+        return Path._from_coords(xs, ys, cost[p])
 
-    while len(to_search) > 0:
+    try:
+        while len(to_search) > 0:
+            curr_cost, current_set = to_search.min()
+
+            current = current_set.pop()
+            if len(current_set) == 0:
+                to_search.pop()
+            if current in searched:
+                continue
+
+            if callback:
+                callback(build_path(current))
+            if log is not None:
+                log.expand(prev.get(current, current), current)
+
+            if current in goals:
+                path = build_path(current)
+                if log is not None:
+                    log.solution(path)
+                return path
+
+            if prefetcher:
+                prefetcher.prefetch(to_search, searched)
+            neighbors = list(set(get_neighbors(current)) - searched)
+            for neighbor, dist in zip(neighbors, _distances(get_distance, current, neighbors)):
+                calc = cost[current] + dist
+
+                if calc < cost[neighbor]:
+                    prev[neighbor] = current
+                    cost[neighbor] = calc
+
+                    cost_with_heuristic[neighbor] = calc + heuristic(neighbor)
+                    if max_cost and cost_with_heuristic[neighbor] > max_cost:
+                        continue
+                    if cost_with_heuristic[neighbor] in to_search:
+                        to_search[cost_with_heuristic[neighbor]].add(neighbor)
+                    else:
+                        to_search[cost_with_heuristic[neighbor]] = {neighbor}
+
+            searched.add(current)
+        return None
+    finally:
+        if prefetcher:
+            # work still queued for nodes that will never be expanded
+            prefetcher.close()
+
+
+def nearest_goal(start: Coord,
+                 goals: Iterable[Coord],
+                 get_neighbors: Callable[[Point], Iterable[Point]],
+                 get_distance: Callable[[Point, Point], Number] = distance,
+                 heuristic: Optional[Callable[[Point, Point], Number]] = None,
+                 callback: Optional[Callable[[Path], None]] = None,
+                 max_cost: Optional[Number] = None,
+                 executor: Optional["Executor"] = None,
+                 prefetch: int = 8,
+                 log: Optional["SearchLog"] = None) -> Optional[Path]:
+    """
+    Returns the shortest path from the start to whichever of the goals is closest, in a single search.
+    The search is a_star with the estimate to the nearest goal as its heuristic, so the path is the shortest one as long as the heuristic does not overestimate.
+
+    Args:
+        start (Coord): The point to start from.
+
+        goals (Iterable[Coord]): The possible destinations.
+
+        get_neighbors (Callable[[Point], Iterable[Point]]):
+            A function that returns the points reachable in one step from a point.
+
+        get_distance (Callable[[Point, Point], Number]):
+            A function that computes the cost to travel between two given Points. By default this is the distance formula.
+
+        heuristic (Optional[Callable[[Point, Point], Number]]):
+            A function that estimates the cost from a point to a goal, or None to not use a heuristic.
+            The estimate for a point is the minimum over all goals. If this is a Metric, the goals are scored in one batch.
+
+        callback, max_cost, executor, prefetch, log:
+            The same as for a_star.
+
+    Returns:
+         A Path from start to the nearest goal, or None if no goal can be reached.
+    """
+
+    goals = [conv_coord(g) for g in goals]
+    if len(goals) == 0:
+        return None
+
+    if heuristic is None:
+        def estimate(point: Point) -> Number:
+            return 0
+    elif getattr(heuristic, "batch", None) is not None:
+        def estimate(point: Point) -> Number:
+            return min(heuristic.batch(point, goals))
+    else:
+        def estimate(point: Point) -> Number:
+            return min(heuristic(point, g) for g in goals)
+
+    return _a_star(conv_coord(start), set(goals), get_neighbors, get_distance, estimate, callback, max_cost, executor, prefetch, log)
+
+
+def costs_to_goals(start: Coord,
+                   goals: Iterable[Coord],
+                   get_neighbors: Callable[[Point], Iterable[Point]],
+                   get_distance: Callable[[Point, Point], Number] = distance,
+                   max_cost: Optional[Number] = None) -> Dict[Point, Number]:
+    """
+    Returns the cost of the shortest path from the start to each of the goals, in a single Dijkstra search.
+    The search stops as soon as every goal has been reached.
+
+    Args:
+        start (Coord): The point to start from.
+
+        goals (Iterable[Coord]): The destinations.
+
+        get_neighbors (Callable[[Point], Iterable[Point]]):
+            A function that returns the points reachable in one step from a point.
+
+        get_distance (Callable[[Point, Point], Number]):
+            A function that computes the cost to travel between two given Points. By default this is the distance formula.
+
+        max_cost (Optional[Number]):
+            Points further than this from the start are not searched, or None to search everything.
+            This must be set if the search space is infinite and some goal may be unreachable.
+
+    Returns:
+        A dict mapping each goal to its cost, which is infinity if it cannot be reached.
+    """
+
+    start = conv_coord(start)
+    remaining = {conv_coord(g) for g in goals}
+    result = {g: float("inf") for g in remaining}
+
+    to_search = prioritymap()
+    searched = set()
+    cost = defaultdict(lambda: float("inf"))
+
+    cost[start] = 0
+    to_search[0] = {start}
+
+    while len(to_search) > 0 and len(remaining) > 0:
         curr_cost, current_set = to_search.min()
 
         current = current_set.pop()
@@ -95,29 +553,25 @@ def a_star(start: Coord,
         if current in searched:
             continue
 
-        if callback:
-            callback(build_path(current))
-
-        if current == end:
-            return build_path(current)
+        if current in remaining:
+            result[current] = cost[current]
+            remaining.remove(current)
 
-        for neighbor in set(get_neighbors(current)) - searched:
-            calc = cost[current] + get_distance(current, neighbor)
+        neighbors = list(set(get_neighbors(current)) - searched)
+        for neighbor, dist in zip(neighbors, _distances(get_distance, current, neighbors)):
+            calc = cost[current] + dist
 
             if calc < cost[neighbor]:
-                prev[neighbor] = current
-                cost[neighbor] = calc
-
-                cost_with_heuristic[neighbor] = calc + heuristic(neighbor)
-                if max_cost and cost_with_heuristic[neighbor] > max_cost:
+                if max_cost is not None and calc > max_cost:
                     continue
-                if cost_with_heuristic[neighbor] in to_search:
-                    to_search[cost_with_heuristic[neighbor]].add(neighbor)
+                cost[neighbor] = calc
+                if calc in to_search:
+                    to_search[calc].add(neighbor)
                 else:
-                    to_search[cost_with_heuristic[neighbor]] = {neighbor}
+                    to_search[calc] = {neighbor}
 
         searched.add(current)
-    return None
+    return result
 
 
 def ara(start: Coord,
@@ -127,7 +581,10 @@ def ara(start: Coord,
         factors: Iterable[Number] = (10, 8, 6, 4, 2, 1),
         heuristic: Callable[[Point], Number] = lambda point: 0,
         callback: Optional[Callable[[Point, Point], None]] = None,
-        ) -> Iterable[Iterable[Point]]:
+        executor: Optional["Executor"] = None,
+        prefetch: int = 8,
+        log: Optional["SearchLog"] = None,
+        ) -> Iterable[Path]:
     factors = list(factors)
 
     start = conv_coord(start)
@@ -147,59 +604,457 @@ def ara(start: Coord,
 
     best_cost = float("inf")
 
-    def build_path(p: Point) -> Iterable[Point]:
-        path = []
+    prefetcher = _NeighborPrefetcher(get_neighbors, executor, prefetch) if executor is not None else None
+    if prefetcher:
+        get_neighbors = prefetcher
+
+    def build_path(p: Point) -> Path:
+        xs, ys = [], []
+        tmp = p
+        while tmp != start:
+            xs.append(tmp.x)
+            ys.append(tmp.y)
+            tmp = prev[tmp]
+        xs.append(start.x)
+        ys.append(start.y)
+        xs.reverse()
+        ys.reverse()
+        return Path._from_coords(xs, ys, cost[p])
+
+    try:
+        while len(to_search) > 0 and len(factors) > 0:
+            curr_cost, current_set = to_search.min()
+
+            current = current_set.pop()
+            if len(current_set) == 0:
+                to_search.pop()
+
+            if callback:
+                callback(prev[current], current)
+            if log is not None:
+                log.expand(prev[current], current)
+
+            if current == end:
+                # searched.remove(current)
+                if cost[current] < best_cost:
+                    best_cost = cost[current]
+                    path = build_path(current)
+                    if log is not None:
+                        log.solution(path)
+                    yield path
+                factors = factors[1:]
+
+                if len(factors) == 0:
+                    break
+
+                nodes = [x for s in to_search.values() for x in s]
+                new_to_search = prioritymap()
+                for node, h in zip(nodes, _estimates(heuristic, nodes)):
+                    ch = cost[node] + factors[0] * h
+                    cost_with_heuristic[node] = ch
+                    if ch in new_to_search:
+                        new_to_search[ch].add(node)
+                    else:
+                        new_to_search[ch] = {node}
+                to_search = new_to_search
+
+                continue
+
+            if prefetcher:
+                prefetcher.prefetch(to_search, ())
+            neighbors = list(set(get_neighbors(current)))
+            for neighbor, dist in zip(neighbors, _distances(get_distance, current, neighbors)):
+                calc = cost[current] + dist
+                if calc >= cost[neighbor]:
+                    continue
+                h = heuristic(neighbor)
+
+                if calc + h < best_cost:
+                    prev[neighbor] = current
+                    cost[neighbor] = calc
+
+                    cost_with_heuristic[neighbor] = calc + factors[0] * h
+                    if cost_with_heuristic[neighbor] in to_search:
+                        to_search[cost_with_heuristic[neighbor]].add(neighbor)
+                    else:
+                        to_search[cost_with_heuristic[neighbor]] = {neighbor}
+        return None
+    finally:
+        if prefetcher:
+            # work still queued for nodes that will never be expanded
+            prefetcher.close()
+
+
+def supercover(c1: Coord, c2: Coord) -> Iterator[Tuple[int, int]]:
+    """Yields every grid cell that the line between the centers of two cells passes through, using only integer arithmetic.
+    When the line passes exactly through a corner, both cells beside the corner are yielded, so the result is conservative.
+
+    Args:
+        c1 (Coord): The first cell.
+        c2 (Coord): The second cell.
+
+    Yields:
+        (x, y) cells from c1 to c2 inclusive.
+    """
+
+    x, y = int(c1[0]), int(c1[1])
+    x2, y2 = int(c2[0]), int(c2[1])
+    dx, dy = abs(x2 - x), abs(y2 - y)
+    sx = 1 if x2 > x else -1
+    sy = 1 if y2 > y else -1
+
+    yield x, y
+    ix = iy = 0
+    while ix < dx or iy < dy:
+        # compare the distance to the next vertical and horizontal cell boundaries, scaled by 2 * dx * dy
+        decision = (1 + 2 * ix) * dy - (1 + 2 * iy) * dx
+        if decision == 0:
+            yield x + sx, y
+            yield x, y + sy
+            x += sx
+            y += sy
+            ix += 1
+            iy += 1
+        elif decision < 0:
+            x += sx
+            ix += 1
+        else:
+            y += sy
+            iy += 1
+        yield x, y
+
+
+def line_of_sight(blocked: Collection[Tuple[int, int]], c1: Coord, c2: Coord) -> bool:
+    """Returns True if none of the cells between two cells (inclusive) are blocked, False if not.
+
+    Args:
+        blocked (Collection[Tuple[int, int]]): The blocked (x, y) cells.
+        c1 (Coord): The first cell.
+        c2 (Coord): The second cell.
+    """
+
+    for cell in supercover(c1, c2):
+        if cell in blocked:
+            return False
+    return True
+
+
+_STEPS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+def lazy_theta_star(start: Coord,
+                    end: Coord,
+                    blocked: Collection[Tuple[int, int]],
+                    bounds: Tuple[int, int],
+                    heuristic: Optional[Callable[[Point], Number]] = None,
+                    callback: Optional[Callable[[Point, Point], None]] = None,
+                    log: Optional["SearchLog"] = None) -> Optional[Path]:
+    """
+    Returns an any-angle path between two cells of an occupancy grid (Lazy Theta*).
+    The search moves between 8-connected cells like a grid search, but each cell may take its parent's parent as its own parent,
+    so the path is made of straight lines between arbitrary cells instead of grid steps.
+    Line of sight is only checked when a cell is expanded, so most cells never need a check.
+
+    Args:
+        start (Coord): The cell to start from.
+
+        end (Coord): The destination cell.
+
+        blocked (Collection[Tuple[int, int]]):
+            The blocked (x, y) cells, e.g. the points set in main.py.
+
+        bounds (Tuple[int, int]):
+            The largest x and y cell. The search stays within (0, 0) and bounds inclusive.
+
+        heuristic (Optional[Callable[[Point], Number]]):
+            A function that estimates the cost from a cell to the destination, or None to use the straight-line distance.
+
+        callback (Optional[Callable[[Point, Point], None]]:
+            A callback that is called with a cell's parent and the cell whenever a cell is expanded, or None to not use one.
+
+        log (Optional[SearchLog]):
+            A SearchLog that every expansion and the solution are written to, or None to not log.
+
+    Returns:
+         A Path from start to end with its euclidean cost, or None if no path could be found.
+    """
+
+    start = conv_coord(start)
+    end = conv_coord(end)
+    if heuristic is None:
+        heuristic = euclidean.to(end)
+
+    width, height = bounds
+
+    def free(x: int, y: int) -> bool:
+        return 0 <= x <= width and 0 <= y <= height and (x, y) not in blocked
+
+    def neighbors(p: Point) -> Iterator[Point]:
+        x, y = p.x, p.y
+        for dx, dy in _STEPS:
+            # no squeezing diagonally between two blocked cells, matching supercover()
+            if free(x + dx, y + dy) and (dx == 0 or dy == 0 or (free(x + dx, y) and free(x, y + dy))):
+                yield Point(x + dx, y + dy)
+
+    to_search = prioritymap()
+    searched = set()
+
+    prev = {start: start}
+    cost = defaultdict(lambda: float("inf"))
+    cost[start] = 0
+
+    to_search[heuristic(start)] = {start}
+
+    def build_path(p: Point) -> Path:
+        xs, ys = [], []
         tmp = p
         while tmp != start:
-            path.append(tmp)
+            xs.append(tmp.x)
+            ys.append(tmp.y)
             tmp = prev[tmp]
-        path.append(start)
-        return reversed(path)
+        xs.append(start.x)
+        ys.append(start.y)
+        xs.reverse()
+        ys.reverse()
+        return Path._from_coords(xs, ys, cost[p])
 
-    while len(to_search) > 0 and len(factors) > 0:
+    while len(to_search) > 0:
         curr_cost, current_set = to_search.min()
 
         current = current_set.pop()
         if len(current_set) == 0:
             to_search.pop()
+        if current in searched:
+            continue
+
+        parent = prev[current]
+        if parent != current and not line_of_sight(blocked, parent, current):
+            # the parent was assumed visible when current was queued; fall back to the best expanded neighbor
+            cost[current] = float("inf")
+            for neighbor in neighbors(current):
+                if neighbor in searched:
+                    calc = cost[neighbor] + euclidean(neighbor, current)
+                    if calc < cost[current]:
+                        prev[current] = neighbor
+                        cost[current] = calc
 
         if callback:
             callback(prev[current], current)
+        if log is not None:
+            log.expand(prev[current], current)
 
         if current == end:
-            # searched.remove(current)
-            if cost[current] < best_cost:
-                best_cost = cost[current]
-                yield build_path(current)
-            factors = factors[1:]
+            path = build_path(current)
+            if log is not None:
+                log.solution(path)
+            return path
 
-            if len(factors) == 0:
-                break
-
-            nodes = [x for s in to_search.values() for x in s]
-            new_to_search = prioritymap()
-            for node in nodes:
-                ch = cost[node] + factors[0] * heuristic(node)
-                cost_with_heuristic[node] = ch
-                if ch in new_to_search:
-                    new_to_search[ch].add(node)
-                else:
-                    new_to_search[ch] = {node}
-            to_search = new_to_search
-
-            continue
+        searched.add(current)
+        parent = prev[current]
 
-        for neighbor in set(get_neighbors(current)):
-            calc = cost[current] + get_distance(current, neighbor)
-            # hc = calc + factors[0] * heuristic(neighbor)
+        for neighbor in neighbors(current):
+            if neighbor in searched:
+                continue
+            calc = cost[parent] + euclidean(parent, neighbor)
 
-            if calc < cost[neighbor] and calc + heuristic(neighbor) < best_cost:
-                prev[neighbor] = current
+            if calc < cost[neighbor]:
+                prev[neighbor] = parent
                 cost[neighbor] = calc
 
-                cost_with_heuristic[neighbor] = calc + factors[0] * heuristic(neighbor)
-                if cost_with_heuristic[neighbor] in to_search:
-                    to_search[cost_with_heuristic[neighbor]].add(neighbor)
+                ch = calc + heuristic(neighbor)
+                if ch in to_search:
+                    to_search[ch].add(neighbor)
                 else:
-                    to_search[cost_with_heuristic[neighbor]] = {neighbor}
+                    to_search[ch] = {neighbor}
     return None
+
+
+class FlowField:
+    """The shortest paths from every reachable point to a single goal, stored as dense arrays of costs and next hops.
+    Build one with flow_field(). Any start can then be answered by following next hops, without searching.
+
+    Attributes:
+        goal (Point): The destination every path leads to.
+    """
+
+    def __init__(self,
+                 goal: Point,
+                 get_neighbors: Callable[[Point], Iterable[Point]],
+                 get_distance: Callable[[Point, Point], Number],
+                 get_predecessors: Callable[[Point], Iterable[Point]],
+                 max_cost: Optional[Number]):
+        """Constructs an empty field. Use flow_field() instead."""
+
+        self.goal = goal
+        self.__get_neighbors = get_neighbors
+        self.__get_distance = get_distance
+        self.__get_predecessors = get_predecessors
+        self.__max_cost = max_cost
+
+        self.__ids: Dict[Point, int] = {}
+        self.__points: List[Point] = []
+        self.__cost = array("d")
+        self.__next = array("q")
+
+        i = self.__id(goal)
+        self.__cost[i] = 0.0
+        self.__propagate([(0.0, i)])
+
+    def __id(self, p: Point) -> int:
+        i = self.__ids.get(p)
+        if i is None:
+            i = len(self.__points)
+            self.__ids[p] = i
+            self.__points.append(p)
+            self.__cost.append(float("inf"))
+            self.__next.append(-1)
+        return i
+
+    def __propagate(self, heap: List[Tuple[Number, int]]) -> None:
+        # Dijkstra outward from the goal, lowering the cost of any predecessor that improves
+        heapq.heapify(heap)
+        cost, nxt, points = self.__cost, self.__next, self.__points
+        while len(heap) > 0:
+            c, i = heapq.heappop(heap)
+            if c > cost[i]:
+                continue
+            p = points[i]
+            for q in self.__get_predecessors(p):
+                calc = c + self.__get_distance(q, p)
+                if self.__max_cost is not None and calc > self.__max_cost:
+                    continue
+                j = self.__id(q)
+                if calc < cost[j]:
+                    cost[j] = calc
+                    nxt[j] = i
+                    heapq.heappush(heap, (calc, j))
+
+    def __best_successor(self, i: int) -> Tuple[Number, int]:
+        best, best_j = float("inf"), -1
+        p = self.__points[i]
+        for s in self.__get_neighbors(p):
+            j = self.__ids.get(s)
+            if j is not None and self.__cost[j] < float("inf"):
+                calc = self.__get_distance(p, s) + self.__cost[j]
+                if calc < best:
+                    best, best_j = calc, j
+        return best, best_j
+
+    def cost(self, start: Coord) -> Number:
+        """Returns the cost of the shortest path from start to the goal, or infinity if there is none."""
+
+        i = self.__ids.get(conv_coord(start))
+        return float("inf") if i is None else self.__cost[i]
+
+    def next_hop(self, start: Coord) -> Optional[Point]:
+        """Returns the next point on the shortest path from start to the goal, or None if start is the goal or cannot reach it."""
+
+        i = self.__ids.get(conv_coord(start))
+        if i is None or self.__next[i] < 0:
+            return None
+        return self.__points[self.__next[i]]
+
+    def path(self, start: Coord) -> Optional[Path]:
+        """Returns the shortest path from start to the goal by following next hops, or None if there is none."""
+
+        i = self.__ids.get(conv_coord(start))
+        if i is None or self.__cost[i] == float("inf"):
+            return None
+
+        xs, ys = [], []
+        cost = self.__cost[i]
+        while i >= 0:
+            p = self.__points[i]
+            xs.append(p.x)
+            ys.append(p.y)
+            i = self.__next[i]
+        return Path._from_coords(xs, ys, cost)
+
+    def block(self, point: Coord) -> None:
+        """Updates the field after a point became impassable.
+        get_neighbors and get_predecessors must already reflect the change, except that get_predecessors(point) should still return the points around it.
+        Moves between the points around it that the change removed (e.g. diagonals that would now cut its corner) are handled too.
+        Only the points whose paths went through the blocked point or a removed move are recomputed.
+        """
+
+        point = conv_coord(point)
+        i = self.__ids.get(point)
+
+        # the point, and every point around it whose next hop is no longer one of its neighbors
+        invalid = [] if i is None else [i]
+        for q in self.__get_predecessors(point):
+            j = self.__ids.get(q)
+            if j is not None and j != i and self.__next[j] >= 0 and self.__points[self.__next[j]] not in set(self.__get_neighbors(q)):
+                invalid.append(j)
+
+        # everything whose next hops lead through those
+        seen = set(invalid)
+        for k in invalid:
+            for q in self.__get_predecessors(self.__points[k]):
+                j = self.__ids.get(q)
+                if j is not None and j not in seen and self.__next[j] == k:
+                    seen.add(j)
+                    invalid.append(j)
+        for k in invalid:
+            self.__cost[k] = float("inf")
+            self.__next[k] = -1
+
+        heap = []
+        for k in invalid:
+            if k == i:
+                continue
+            c, j = self.__best_successor(k)
+            if j >= 0:
+                self.__cost[k] = c
+                self.__next[k] = j
+                heap.append((c, k))
+        self.__propagate(heap)
+
+    def unblock(self, point: Coord) -> None:
+        """Updates the field after a point became passable.
+        get_neighbors and get_predecessors must already reflect the change.
+        Moves between the points around it that the change opened up (e.g. diagonals past its corner) are handled too.
+        Only the points whose paths get shorter through the unblocked point or an opened move are recomputed.
+        """
+
+        point = conv_coord(point)
+        heap = []
+        for q in [point] + list(self.__get_predecessors(point)):
+            k = self.__id(q)
+            c, j = self.__best_successor(k)
+            if j >= 0 and c < self.__cost[k]:
+                self.__cost[k] = c
+                self.__next[k] = j
+                heap.append((c, k))
+        self.__propagate(heap)
+
+
+def flow_field(goal: Coord,
+               get_neighbors: Callable[[Point], Iterable[Point]],
+               get_distance: Callable[[Point, Point], Number] = distance,
+               get_predecessors: Optional[Callable[[Point], Iterable[Point]]] = None,
+               max_cost: Optional[Number] = None) -> FlowField:
+    """
+    Runs one reverse Dijkstra search from the goal and returns the shortest path from every reachable point to it.
+    This replaces running a_star separately for each of many agents that share a destination.
+
+    Args:
+        goal (Coord): The destination.
+
+        get_neighbors (Callable[[Point], Iterable[Point]]):
+            A function that returns the points reachable in one step from a point.
+
+        get_distance (Callable[[Point, Point], Number]):
+            A function that computes the cost to travel between two given Points. By default this is the distance formula.
+
+        get_predecessors (Optional[Callable[[Point], Iterable[Point]]]):
+            A function that returns the points that can reach a point in one step, or None if this is the same as get_neighbors (the moves are reversible).
+
+        max_cost (Optional[Number]):
+            Points further than this from the goal are left out, or None to include everything. This must be set if the search space is infinite.
+
+    Returns:
+        A FlowField for the goal.
+    """
+
+    return FlowField(conv_coord(goal), get_neighbors, get_distance, get_predecessors or get_neighbors, max_cost)
@@ -0,0 +1,51 @@
+"""Compares the orientation-based segment predicates in geometry.py with the NumPy homogeneous-coordinate check they replaced.
+
+Usage: python bench_geometry.py [segment pairs]
+"""
+
+import random
+import sys
+import timeit
+from geometry import Line, Point, obstructs
+
+
+def legacy_intersects(l1: Line, l2: Line) -> bool:
+    """The Line.intersects implementation before the orientation predicates, kept for comparison."""
+
+    import numpy as np
+
+    s = np.vstack([np.array([*l1.point1]), np.array([*l1.point2]), np.array([*l2.point1]), np.array([*l2.point2])])
+    h = np.hstack((s, np.ones((4, 1))))
+    x, y, z = np.cross(np.cross(h[0], h[1]), np.cross(h[2], h[3]))
+    if z == 0:
+        return False
+    x, y = x / z, y / z
+    return (max(l1.x_left, l2.x_left) - 0.005 <= x <= min(l1.x_right, l2.x_right) + 0.005) and (
+            max(l1.y_bottom, l2.y_bottom) - 0.005 <= y <= min(l1.y_top, l2.y_top) + 0.005)
+
+
+def legacy_obstructs(l1: Line, l2: Line) -> bool:
+    """The visibility test arena_neighbors used before the orientation predicates."""
+
+    return legacy_intersects(l1, l2) and l1.point_of_intersection(l2) != l1.point1 and l1.point_of_intersection(l2) != l1.point2
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    random.seed(0)
+
+    # small integer coordinates, so touching and collinear cases are common
+    def coord():
+        return Point(random.randint(0, 20), random.randint(0, 20))
+
+    pairs = [(Line(coord(), coord()), Line(coord(), coord())) for _ in range(n)]
+
+    for name, legacy, current in [
+        ("intersects", legacy_intersects, lambda l1, l2: l1.intersects(l2)),
+        ("obstructs", legacy_obstructs, lambda l1, l2: obstructs(l1.point1, l1.point2, l2.point1, l2.point2)),
+    ]:
+        t_legacy = min(timeit.repeat(lambda: [legacy(a, b) for a, b in pairs], number=1, repeat=3))
+        t_current = min(timeit.repeat(lambda: [current(a, b) for a, b in pairs], number=1, repeat=3))
+        disagree = sum(legacy(a, b) != current(a, b) for a, b in pairs)
+        print(f"{name:<11} legacy {t_legacy / n * 1e6:7.2f}us/pair  orientation {t_current / n * 1e6:7.2f}us/pair  "
+              f"speedup {t_legacy / t_current:5.1f}x  disagreements {disagree}/{n}")
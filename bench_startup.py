@@ -0,0 +1,48 @@
+"""Measures cold-start time: importing the planner and answering a first query, each in a fresh interpreter.
+
+Usage: python bench_startup.py [runs]
+"""
+
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import geometry": "import geometry",
+    "import algorithms": "import algorithms",
+    "import ui (pygame)": "import ui",
+    "import algorithms + first query": """
+from algorithms import a_star, euclidean
+from geometry import Point
+blocked = {(x, 10) for x in range(15)}
+neighbors = lambda p: [Point(p.x + dx, p.y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                       if (dx or dy) and 0 <= p.x + dx < 20 and 0 <= p.y + dy < 20 and (p.x + dx, p.y + dy) not in blocked]
+a_star(Point(0, 0), Point(19, 19), neighbors, euclidean, euclidean.to(Point(19, 19)))
+""",
+}
+
+TIMER = """
+import time
+began = time.perf_counter()
+{code}
+print(time.perf_counter() - began)
+print("numpy" in __import__("sys").modules, "pygame" in __import__("sys").modules)
+"""
+
+
+def measure(code: str, runs: int):
+    times = []
+    loaded = None
+    for _ in range(runs):
+        # read from the end, since pygame prints a banner on import
+        out = subprocess.run([sys.executable, "-c", TIMER.format(code=code)], capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[-3]))
+        loaded = " ".join(out[-2:])
+    return min(times), loaded
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'scenario':<36}{'best of ' + str(runs):>12}  numpy/pygame loaded")
+    for name, code in SCENARIOS.items():
+        best, loaded = measure(code, runs)
+        print(f"{name:<36}{best * 1000:>10.1f}ms  {loaded}")
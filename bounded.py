@@ -0,0 +1,358 @@
+import heapq
+import itertools
+from algorithms import distance, Path
+from geometry import Coord, conv_coord, Number, Point
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+
+def _distances(get_distance: Callable[[Point, Point], Number], origin: Point, points: List[Point]) -> Sequence[Number]:
+    # scores all the neighbors at once if get_distance has a batch() method (e.g. a Metric)
+    batch = getattr(get_distance, "batch", None)
+    if batch is not None:
+        return batch(origin, points)
+    return [get_distance(origin, p) for p in points]
+
+
+def _report(stats: Optional[Dict[str, int]], peak: int, expanded: int) -> None:
+    if stats is not None:
+        stats["peak_nodes"] = peak
+        stats["expanded"] = expanded
+
+
+def beam_search(start: Coord,
+                end: Coord,
+                get_neighbors: Callable[[Point], Iterable[Point]],
+                get_distance: Callable[[Point, Point], Number] = distance,
+                heuristic: Callable[[Point], Number] = lambda point: 0,
+                width: int = 64,
+                stats: Optional[Dict[str, int]] = None) -> Optional[Path]:
+    """
+    Returns a path between the start and end points found by beam search.
+    The search advances one step at a time and only keeps the width best points (by cost plus heuristic) of each step.
+    Memory grows with width times the length of the path instead of the size of the search space, but the path may not be the shortest,
+    and a path may not be found even if one exists.
+
+    Args:
+        start (Coord): The point to start from.
+
+        end (Coord): The destination.
+
+        get_neighbors, get_distance, heuristic:
+            The same as for a_star.
+
+        width (int):
+            How many points to keep at each step.
+
+        stats (Optional[Dict[str, int]]):
+            A dict that is filled with "peak_nodes" (the most points held at once) and "expanded", or None.
+
+    Returns:
+         A Path from start to end, or None if no path was found.
+    """
+
+    start = conv_coord(start)
+    end = conv_coord(end)
+
+    # (point, cost, parent entry)
+    beam = [(start, 0, None)]
+    visited = {start}
+    best = None
+    peak = expanded = 1
+
+    def build_path(entry) -> Path:
+        points = []
+        tmp = entry
+        while tmp is not None:
+            points.append(tmp[0])
+            tmp = tmp[2]
+        points.reverse()
+        return Path(points, entry[1])
+
+    if start == end:
+        _report(stats, peak, 0)
+        return build_path(beam[0])
+
+    while len(beam) > 0:
+        candidates = {}
+        for entry in beam:
+            point, cost, _ = entry
+            expanded += 1
+            neighbors = [n for n in set(get_neighbors(point)) if n not in visited]
+            for neighbor, dist in zip(neighbors, _distances(get_distance, point, neighbors)):
+                calc = cost + dist
+                if neighbor not in candidates or calc < candidates[neighbor][1]:
+                    candidates[neighbor] = (neighbor, calc, entry)
+
+        if end in candidates and (best is None or candidates[end][1] < best[1]):
+            best = candidates.pop(end)
+
+        scored = [(entry[1] + heuristic(entry[0]), entry) for entry in candidates.values()]
+        if best is not None:
+            # nothing left in the beam can beat the path already found
+            scored = [(f, entry) for f, entry in scored if f < best[1]]
+        scored.sort(key=lambda x: x[0])
+        beam = [entry for _, entry in scored[:width]]
+        visited.update(entry[0] for entry in beam)
+        peak = max(peak, len(visited) + len(candidates))
+
+    _report(stats, peak, expanded)
+    return build_path(best) if best is not None else None
+
+
+def ida_star(start: Coord,
+             end: Coord,
+             get_neighbors: Callable[[Point], Iterable[Point]],
+             get_distance: Callable[[Point, Point], Number] = distance,
+             heuristic: Callable[[Point], Number] = lambda point: 0,
+             table_size: int = 100000,
+             stats: Optional[Dict[str, int]] = None) -> Optional[Path]:
+    """
+    Returns a path between the start and end points found by iterative deepening A* (IDA*).
+    Each iteration is a depth-first search that gives up on points whose cost plus heuristic exceeds a bound,
+    and the bound grows to the smallest value that was exceeded until the destination is reached.
+    A transposition table remembers the cheapest cost each point was reached with during an iteration, so the same point is not searched twice for no gain.
+    This will always be the shortest path as long as the heuristic does not overestimate.
+
+    Args:
+        start (Coord): The point to start from.
+
+        end (Coord): The destination.
+
+        get_neighbors, get_distance, heuristic:
+            The same as for a_star.
+
+        table_size (int):
+            The most points the transposition table may hold. Memory use is this plus the length of the current path.
+
+        stats (Optional[Dict[str, int]]):
+            A dict that is filled with "peak_nodes" (the most points held at once) and "expanded", or None.
+
+    Returns:
+         A Path from start to end, or None if no path could be found.
+    """
+
+    start = conv_coord(start)
+    end = conv_coord(end)
+
+    bound = heuristic(start)
+    peak = expanded = 0
+
+    while True:
+        table = {start: 0}
+        path = [start]
+        costs = [0]
+        on_path = {start}
+        stack = [iter(get_neighbors(start))]
+        next_bound = float("inf")
+
+        if start == end:
+            _report(stats, 1, 0)
+            return Path(path, 0)
+
+        while len(stack) > 0:
+            neighbor = next(stack[-1], None)
+            if neighbor is None:
+                stack.pop()
+                on_path.remove(path.pop())
+                costs.pop()
+                continue
+            if neighbor in on_path:
+                continue
+
+            calc = costs[-1] + get_distance(path[-1], neighbor)
+            f = calc + heuristic(neighbor)
+            if f > bound:
+                next_bound = min(next_bound, f)
+                continue
+            if calc >= table.get(neighbor, float("inf")):
+                continue
+            if len(table) < table_size or neighbor in table:
+                table[neighbor] = calc
+
+            path.append(neighbor)
+            costs.append(calc)
+            on_path.add(neighbor)
+            peak = max(peak, len(path) + len(table))
+            if neighbor == end:
+                _report(stats, peak, expanded)
+                return Path(path, calc)
+
+            expanded += 1
+            stack.append(iter(get_neighbors(neighbor)))
+
+        if next_bound == float("inf"):
+            _report(stats, peak, expanded)
+            return None
+        bound = next_bound
+
+
+class _Node:
+    """A node in the SMA* search tree."""
+
+    __slots__ = ("point", "g", "f", "depth", "parent", "children", "forgotten", "expanded", "alive")
+
+    def __init__(self, point: Point, g: Number, f: Number, parent: Optional["_Node"]):
+        self.point = point
+        self.g = g
+        self.f = f
+        self.depth = 0 if parent is None else parent.depth + 1
+        self.parent = parent
+        self.children: List["_Node"] = []
+        # the best f of each child that was dropped to free memory
+        self.forgotten: Dict[Point, Number] = {}
+        self.expanded = False
+        self.alive = True
+
+    def key(self) -> Number:
+        """The f of the best thing this node could still generate, or infinity if it has nothing left to generate."""
+
+        if not self.expanded:
+            return self.f
+        return min(self.forgotten.values()) if len(self.forgotten) > 0 else float("inf")
+
+
+def sma_star(start: Coord,
+             end: Coord,
+             get_neighbors: Callable[[Point], Iterable[Point]],
+             get_distance: Callable[[Point, Point], Number] = distance,
+             heuristic: Callable[[Point], Number] = lambda point: 0,
+             max_nodes: int = 10000,
+             stats: Optional[Dict[str, int]] = None) -> Optional[Path]:
+    """
+    Returns a path between the start and end points found by simplified memory-bounded A* (SMA*).
+    The search behaves like A* until it holds max_nodes points. After that it drops the worst leaf to make room
+    and remembers the leaf's cost estimate in its parent, so the branch can be regenerated if it turns out to be the best one after all.
+    The path is the shortest one if the shortest path fits in memory (has fewer than max_nodes points) and the heuristic does not overestimate.
+    Otherwise, the best path that fits is returned.
+    Like ida_star, this searches a tree of paths rather than a graph of points, so proving that there is no path can take exponentially long.
+
+    Args:
+        start (Coord): The point to start from.
+
+        end (Coord): The destination.
+
+        get_neighbors, get_distance, heuristic:
+            The same as for a_star.
+
+        max_nodes (int):
+            The most points to hold at once. A point's neighbors are generated together, so this can be exceeded by one point's neighbors briefly.
+            The queues of points to search and to drop are compacted whenever they hold more than a few entries per point,
+            so the memory used stays proportional to this.
+
+        stats (Optional[Dict[str, int]]):
+            A dict that is filled with "peak_nodes" (the most points plus queue entries held at once) and "expanded", or None.
+
+    Returns:
+         A Path from start to end, or None if no path could be found.
+    """
+
+    start = conv_coord(start)
+    end = conv_coord(end)
+
+    counter = itertools.count()
+    root = _Node(start, 0, heuristic(start), None)
+    count = 1
+    peak = 2
+    expanded = 0
+
+    # best candidates to generate from (lowest key, deepest first), and leaves to drop (highest f, shallowest first)
+    to_search = [(root.key(), -root.depth, next(counter), root)]
+    leaves = []
+
+    def push_leaf(node: _Node) -> None:
+        if node is not root and len(node.children) == 0:
+            heapq.heappush(leaves, (-node.f, node.depth, next(counter), node))
+
+    def backup(node: _Node) -> None:
+        # pull the best f of the children up the tree
+        while node is not None and node.expanded:
+            best = min([c.f for c in node.children] + list(node.forgotten.values()), default=float("inf"))
+            if best == node.f:
+                break
+            node.f = best
+            push_leaf(node)
+            node = node.parent
+
+    def build_path(node: _Node) -> Path:
+        points = []
+        tmp = node
+        while tmp is not None:
+            points.append(tmp.point)
+            tmp = tmp.parent
+        points.reverse()
+        return Path(points, node.g)
+
+    def compact() -> None:
+        # rebuilds both queues from the nodes still in memory, so stale entries (and the dropped nodes they point to) are freed
+        nonlocal to_search, leaves
+        live = [root]
+        for node in live:
+            live += node.children
+        to_search = [(node.key(), -node.depth, next(counter), node) for node in live if node.key() < float("inf")]
+        heapq.heapify(to_search)
+        leaves = []
+        for node in live:
+            push_leaf(node)
+
+    while len(to_search) > 0:
+        key, _, _, node = heapq.heappop(to_search)
+        if not node.alive or key != node.key():
+            continue
+        if key == float("inf"):
+            break
+
+        if node.point == end:
+            _report(stats, peak, expanded)
+            return build_path(node)
+
+        expanded += 1
+        ancestors = set()
+        tmp = node
+        while tmp is not None:
+            ancestors.add(tmp.point)
+            tmp = tmp.parent
+
+        regenerate = node.forgotten if node.expanded else None
+        node.expanded = True
+        neighbors = [n for n in set(get_neighbors(node.point)) if n not in ancestors and (regenerate is None or n in regenerate)]
+        if node.depth + 1 >= max_nodes:
+            # a longer path could never fit in memory
+            neighbors = [n for n in neighbors if n == end]
+
+        for neighbor, dist in zip(neighbors, _distances(get_distance, node.point, neighbors)):
+            g = node.g + dist
+            f = max(node.f, g + heuristic(neighbor))
+            if regenerate is not None:
+                f = max(f, regenerate.pop(neighbor))
+            child = _Node(neighbor, g, f, node)
+            node.children.append(child)
+            count += 1
+            heapq.heappush(to_search, (child.key(), -child.depth, next(counter), child))
+            push_leaf(child)
+        if regenerate is not None:
+            regenerate.clear()
+
+        backup(node)
+        push_leaf(node)
+        heapq.heappush(to_search, (node.key(), -node.depth, next(counter), node))
+        peak = max(peak, count + len(to_search) + len(leaves))
+
+        while count > max_nodes and len(leaves) > 0:
+            neg_f, _, _, leaf = heapq.heappop(leaves)
+            if not leaf.alive or len(leaf.children) > 0 or -neg_f != leaf.f:
+                continue
+            parent = leaf.parent
+            leaf.alive = False
+            parent.children.remove(leaf)
+            if leaf.f < float("inf"):
+                parent.forgotten[leaf.point] = min(leaf.f, parent.forgotten.get(leaf.point, float("inf")))
+            count -= 1
+            push_leaf(parent)
+            heapq.heappush(to_search, (parent.key(), -parent.depth, next(counter), parent))
+
+        peak = max(peak, count + len(to_search) + len(leaves))
+        if len(to_search) + len(leaves) > 4 * max(count, max_nodes):
+            compact()
+
+    _report(stats, peak, expanded)
+    return None
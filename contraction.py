@@ -0,0 +1,264 @@
+import heapq
+import pickle
+from algorithms import distance, Path
+from collections import deque
+from geometry import Coord, conv_coord, Number, Point
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+class ContractionHierarchy:
+    """A contraction hierarchy over a fixed graph, for answering many shortest-path queries quickly.
+
+    Building it contracts the nodes one at a time, from least to most important.
+    Each contraction adds shortcut edges that keep the distances between the remaining nodes the same.
+    A query then runs two small Dijkstra searches: forward from the start and backward from the end.
+    Each search only follows edges toward more important nodes, and the two meet in the middle.
+    Shortcuts are unpacked back into the original edges afterwards.
+
+    Attributes:
+        nodes (List[Point]): Every node in the graph. A node's index in this list is its id.
+    """
+
+    def __init__(self, nodes: List[Point], up_out: List[Dict[int, Number]], up_in: List[Dict[int, Number]],
+                 middle: Dict[Tuple[int, int], int]):
+        """Constructs a hierarchy out of already contracted data. Use build() or load() instead.
+
+        Args:
+            nodes (List[Point]): The nodes. Ids are indexes into this list.
+            up_out (List[Dict[int, Number]]): For each node, the edges leaving it toward more important nodes, with their costs.
+            up_in (List[Dict[int, Number]]): For each node, the edges entering it from more important nodes, with their costs.
+            middle (Dict[Tuple[int, int], int]): For each shortcut (from, to), the node it skips over.
+        """
+
+        self.nodes = nodes
+        self.__ids = {node: i for i, node in enumerate(nodes)}
+        self.__up_out = up_out
+        self.__up_in = up_in
+        self.__middle = middle
+
+    @classmethod
+    def build(cls,
+              seeds: Iterable[Coord],
+              get_neighbors: Callable[[Point], Iterable[Point]],
+              get_distance: Callable[[Point, Point], Number] = distance,
+              witness_limit: int = 64) -> "ContractionHierarchy":
+        """Explores the graph reachable from the seeds and contracts it.
+
+        Args:
+            seeds (Iterable[Coord]): Points to start exploring from. Every node reachable from them is part of the graph.
+
+            get_neighbors (Callable[[Point], Iterable[Point]]):
+                A function that returns the points reachable in one step from a point, e.g. neighbors_grid or a visibility graph.
+                The graph must be finite.
+
+            get_distance (Callable[[Point, Point], Number]):
+                A function that computes the cost to travel between two given Points. By default this is the distance formula.
+
+            witness_limit (int):
+                How many nodes a search for a path that avoids a contracted node may settle before giving up and adding the shortcut anyway.
+                Higher limits take longer to build but add fewer shortcuts.
+
+        Returns:
+            The hierarchy.
+        """
+
+        nodes = []
+        ids = {}
+        out_edges: List[Dict[int, Number]] = []
+
+        def node_id(p: Point) -> int:
+            if p not in ids:
+                ids[p] = len(nodes)
+                nodes.append(p)
+                out_edges.append({})
+                queue.append(p)
+            return ids[p]
+
+        queue = deque()
+        for seed in seeds:
+            node_id(conv_coord(seed))
+        while len(queue) > 0:
+            p = queue.popleft()
+            i = ids[p]
+            for neighbor in get_neighbors(p):
+                j = node_id(neighbor)
+                if j != i:
+                    c = get_distance(p, neighbor)
+                    if c < out_edges[i].get(j, float("inf")):
+                        out_edges[i][j] = c
+
+        in_edges: List[Dict[int, Number]] = [{} for _ in nodes]
+        for i, edges in enumerate(out_edges):
+            for j, c in edges.items():
+                in_edges[j][i] = c
+
+        contracted = [False] * len(nodes)
+        deleted_neighbors = [0] * len(nodes)
+        up_out: List[Dict[int, Number]] = [{} for _ in nodes]
+        up_in: List[Dict[int, Number]] = [{} for _ in nodes]
+        middle: Dict[Tuple[int, int], int] = {}
+
+        def witness(source: int, skip: int, limit: Number) -> Dict[int, Number]:
+            # distances from source to nearby nodes without passing through skip, up to limit
+            dist = {source: 0}
+            heap = [(0, source)]
+            settled = 0
+            while len(heap) > 0 and settled < witness_limit:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                if d > limit:
+                    break
+                settled += 1
+                for v, c in out_edges[u].items():
+                    if v == skip or contracted[v]:
+                        continue
+                    nd = d + c
+                    if nd < dist.get(v, float("inf")):
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, v))
+            return dist
+
+        def shortcuts(v: int) -> List[Tuple[int, int, Number]]:
+            needed = []
+            for u, cu in in_edges[v].items():
+                targets = [(w, cu + cw) for w, cw in out_edges[v].items() if w != u]
+                if len(targets) == 0:
+                    continue
+                dist = witness(u, v, max(c for _, c in targets))
+                for w, via in targets:
+                    if dist.get(w, float("inf")) > via:
+                        needed.append((u, w, via))
+            return needed
+
+        def priority(v: int, needed: List[Tuple[int, int, Number]]) -> int:
+            # edge difference, plus a term that spreads contractions evenly over the graph
+            return len(needed) - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbors[v]
+
+        heap = [(priority(v, shortcuts(v)), v) for v in range(len(nodes))]
+        heapq.heapify(heap)
+
+        while len(heap) > 0:
+            _, v = heapq.heappop(heap)
+            if contracted[v]:
+                continue
+
+            # priorities go stale as neighbors are contracted; recompute lazily
+            needed = shortcuts(v)
+            p = priority(v, needed)
+            if len(heap) > 0 and p > heap[0][0]:
+                heapq.heappush(heap, (p, v))
+                continue
+
+            for u, w, via in needed:
+                if via < out_edges[u].get(w, float("inf")):
+                    out_edges[u][w] = via
+                    in_edges[w][u] = via
+                    middle[(u, w)] = v
+
+            # everything still attached to v is contracted later, so these edges all point up the hierarchy
+            up_out[v] = dict(out_edges[v])
+            up_in[v] = dict(in_edges[v])
+            for w in out_edges[v]:
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+            for u in in_edges[v]:
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+            out_edges[v] = {}
+            in_edges[v] = {}
+            contracted[v] = True
+
+        return cls(nodes, up_out, up_in, middle)
+
+    def query(self, start: Coord, end: Coord) -> Optional[Path]:
+        """Returns the shortest path between two nodes of the graph.
+
+        Args:
+            start (Coord): The point to start from.
+            end (Coord): The destination.
+
+        Returns:
+            A Path from start to end, or None if either point is not in the graph or no path exists.
+        """
+
+        start = conv_coord(start)
+        end = conv_coord(end)
+        if start not in self.__ids or end not in self.__ids:
+            return None
+        s = self.__ids[start]
+        t = self.__ids[end]
+
+        forward, forward_prev = self.__upward(s, self.__up_out)
+        backward, backward_prev = self.__upward(t, self.__up_in)
+
+        best, meet = float("inf"), None
+        for v, d in forward.items():
+            if v in backward and d + backward[v] < best:
+                best, meet = d + backward[v], v
+        if meet is None:
+            return None
+
+        ids = [meet]
+        while ids[-1] != s:
+            ids.append(forward_prev[ids[-1]])
+        ids.reverse()
+        tmp = meet
+        while tmp != t:
+            tmp = backward_prev[tmp]
+            ids.append(tmp)
+
+        unpacked = [s]
+        for a, b in zip(ids[:-1], ids[1:]):
+            self.__unpack(a, b, unpacked)
+        return Path((self.nodes[i] for i in unpacked), best)
+
+    @staticmethod
+    def __upward(source: int, edges: List[Dict[int, Number]]) -> Tuple[Dict[int, Number], Dict[int, int]]:
+        # every node the upward search reaches, with its distance and predecessor
+        dist = {source: 0}
+        prev = {}
+        heap = [(0, source)]
+        while len(heap) > 0:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, c in edges[u].items():
+                nd = d + c
+                if nd < dist.get(v, float("inf")):
+                    dist[v] = nd
+                    prev[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, prev
+
+    def __unpack(self, a: int, b: int, out: List[int]) -> None:
+        # appends the original nodes after a on the edge a -> b, expanding shortcuts without recursion
+        stack = [(a, b)]
+        while len(stack) > 0:
+            u, w = stack.pop()
+            v = self.__middle.get((u, w))
+            if v is None:
+                out.append(w)
+            else:
+                stack.append((v, w))
+                stack.append((u, v))
+
+    def save(self, file: str) -> None:
+        """Writes the hierarchy to a file so it can be reused with load()."""
+
+        data = {
+            "nodes": [(p.x, p.y) for p in self.nodes],
+            "up_out": self.__up_out,
+            "up_in": self.__up_in,
+            "middle": self.__middle,
+        }
+        with open(file, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, file: str) -> "ContractionHierarchy":
+        """Reads a hierarchy written by save(). Only load files you trust, since this uses pickle."""
+
+        with open(file, "rb") as f:
+            data = pickle.load(f)
+        return cls([Point(x, y) for x, y in data["nodes"]], data["up_out"], data["up_in"], data["middle"])
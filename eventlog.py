@@ -0,0 +1,129 @@
+import struct
+from geometry import Coord, conv_coord, Line, Number, Point, Rect, Shape
+from typing import BinaryIO, Iterator, Tuple, TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from algorithms import Path
+
+# record kinds
+LINE = 1        # an obstacle edge: x1, y1, x2, y2
+RECT = 2        # a solid obstacle: lower left x, y, upper right x, y
+ENDPOINTS = 3   # start x, y, goal x, y
+EXPAND = 4      # a point was expanded: parent x, y, point x, y
+SOLUTION = 5    # a path was found: cost, number of points. Followed by that many POINT records
+POINT = 6       # a point of the last solution: x, y
+
+_HEADER = struct.Struct("<4sI")
+_MAGIC = b"SLOG"
+_VERSION = 1
+_RECORD = struct.Struct("<Bffff")
+
+Event = Tuple[int, float, float, float, float]
+
+
+class SearchLog:
+    """An append-only binary log of a search, to be watched later with replay.py instead of drawing while searching.
+
+    The file is a header followed by fixed-width records of a kind byte and four float32 values (17 bytes each).
+    Records are packed into a buffer and written in large blocks, so logging an expansion costs about as much as a function call.
+    Pass a SearchLog as the log argument of a_star, nearest_goal, ara or lazy_theta_star.
+    """
+
+    def __init__(self, file: Union[str, BinaryIO], buffer_size: int = 1 << 16):
+        """
+        Args:
+            file (Union[str, BinaryIO]): The path to write to (an existing file is overwritten), or a binary file object.
+            buffer_size (int): How many bytes to collect before writing them to the file.
+        """
+
+        self.__owns_file = isinstance(file, str)
+        self.__file = open(file, "wb") if self.__owns_file else file
+        self.__file.write(_HEADER.pack(_MAGIC, _VERSION))
+        self.__buffer = bytearray()
+        self.__buffer_size = buffer_size
+        self.__pack = _RECORD.pack
+
+    def __write(self, kind: int, a: Number, b: Number, c: Number, d: Number) -> None:
+        self.__buffer += self.__pack(kind, a, b, c, d)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def obstacle(self, obj: Union[Line, Shape, Rect]) -> None:
+        """Records an obstacle, so the replay can draw the arena."""
+
+        if isinstance(obj, Rect):
+            self.__write(RECT, obj.lower_left.x, obj.lower_left.y, obj.upper_right.x, obj.upper_right.y)
+        elif isinstance(obj, Line):
+            self.__write(LINE, obj.point1.x, obj.point1.y, obj.point2.x, obj.point2.y)
+        else:
+            for line in obj.lines:
+                self.__write(LINE, line.point1.x, line.point1.y, line.point2.x, line.point2.y)
+
+    def endpoints(self, start: Coord, goal: Coord) -> None:
+        """Records the start and goal of the search."""
+
+        start, goal = conv_coord(start), conv_coord(goal)
+        self.__write(ENDPOINTS, start.x, start.y, goal.x, goal.y)
+
+    def expand(self, parent: Point, point: Point) -> None:
+        """Records that a point was expanded, having been reached from parent."""
+
+        # the hottest call, so __write is inlined
+        self.__buffer += self.__pack(EXPAND, parent.x, parent.y, point.x, point.y)
+        if len(self.__buffer) >= self.__buffer_size:
+            self.flush()
+
+    def solution(self, path: "Path") -> None:
+        """Records a path that was found."""
+
+        self.__write(SOLUTION, path.cost, len(path), 0, 0)
+        for point in path:
+            self.__write(POINT, point.x, point.y, 0, 0)
+
+    def flush(self) -> None:
+        """Writes the buffered records to the file."""
+
+        self.__file.write(self.__buffer)
+        self.__buffer.clear()
+        self.__file.flush()
+
+    def close(self) -> None:
+        """Flushes the log and closes the file if this log opened it."""
+
+        self.flush()
+        if self.__owns_file:
+            self.__file.close()
+
+    def __enter__(self) -> "SearchLog":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def read_events(file: Union[str, BinaryIO], chunk_records: int = 4096) -> Iterator[Event]:
+    """Yields the records of a log written by SearchLog as (kind, a, b, c, d) tuples, in the order they were written.
+    A partial record at the end (from a search that was killed mid-write) is ignored.
+
+    Args:
+        file (Union[str, BinaryIO]): The path of the log, or a binary file object.
+        chunk_records (int): How many records to read from the file at a time.
+    """
+
+    f = open(file, "rb") if isinstance(file, str) else file
+    try:
+        header = f.read(_HEADER.size)
+        if len(header) < _HEADER.size or _HEADER.unpack(header) != (_MAGIC, _VERSION):
+            raise Exception(f"{getattr(f, 'name', file)} is not a search log.")
+
+        chunk_size = chunk_records * _RECORD.size
+        while True:
+            chunk = f.read(chunk_size)
+            whole = len(chunk) - len(chunk) % _RECORD.size
+            yield from _RECORD.iter_unpack(memoryview(chunk)[:whole])
+            if len(chunk) < chunk_size:
+                return
+    finally:
+        if f is not file:
+            f.close()
+
@@ -1,14 +1,16 @@
-from ui import Shape, Line, Point, Rect, UI, Number, Coord, conv_coord
-from algorithms import ara, distance
-from typing import Iterable
+from geometry import Shape, Line, Point, Rect, Number, Coord, conv_coord, bounding_boxes_overlap, obstructs, turn
+from algorithms import ara, euclidean, lazy_theta_star, Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from collections import defaultdict
+from math import atan2, pi
+import argparse
 import time
-import sys
 import random
 import itertools
 
 
 def should_try_intersect(l1: Line, l2: Line):
-    return l1.x_left - 0.0005 <= l2.x_right + 0.0005 and l1.x_right + 0.0005 >= l2.x_left - 0.0005 and l1.y_bottom - 0.0005 <= l2.y_top + 0.0005 and l1.y_top + 0.0005 >= l2.y_bottom - 0.0005
+    return bounding_boxes_overlap(l1, l2)
 
 
 def neighbors_free_space(lines: Iterable[Line], grid_size: Number, point: Point, diagonals=True):
@@ -36,41 +38,178 @@ def neighbors_free_space(lines: Iterable[Line], grid_size: Number, point: Point,
     return candidates
 
 
-def do_thing(arena, goal, start):
-    # ui.add("blue lines = searched paths; red line = current path; green line = complete path;",
-    #       coord=ui.dimensions().upper_left, align="left")
+def convex_corners(arena: Iterable[Union[Shape, Rect]]) -> Dict[Point, List[Tuple[Union[Shape, Rect], Point, Point]]]:
+    """Finds the vertices of an arena that a shortest path can bend around.
+    Concave and collinear vertices are dropped.
+    Vertices shared by several shapes are classified by the angles the shapes cover around them,
+    so corners buried inside a group of shapes (e.g. the middle of a block of Rects) are dropped too.
+
+    Args:
+        arena (Iterable[Union[Shape, Rect]]): The obstacles.
 
-    arena_points = {}
+    Returns:
+        A dict mapping each convex corner to a list of (a shape it is convex in, the previous vertex, the next vertex),
+        one for each shape, since a vertex can be shared.
+    """
+
+    # vertex -> the (start angle, angle) each shape covers around it, counterclockwise
+    wedges = defaultdict(list)
+    found = []
     for shape in arena:
+        area = sum(line.point1.x * line.point2.y - line.point2.x * line.point1.y for line in shape.lines)
         for i, line in enumerate(shape.lines):
-            arena_points[line.point1] = (shape, shape.lines[i - 1].point1, line.point2)
+            vertex, prev, nxt = line.point1, shape.lines[i - 1].point1, line.point2
+            to_prev = atan2(prev.y - vertex.y, prev.x - vertex.x)
+            to_next = atan2(nxt.y - vertex.y, nxt.x - vertex.x)
+            # counterclockwise shapes have their inside to the left of each edge
+            begin, end = (to_next, to_prev) if area > 0 else (to_prev, to_next)
+            wedges[vertex].append((begin % (2 * pi), (end - begin) % (2 * pi)))
+            if turn(prev, vertex, nxt) * area > 0:
+                found.append((vertex, shape, prev, nxt))
+
+    def is_outward(vertex: Point) -> bool:
+        # a vertex is a usable corner unless the free space around it is a single arc of at most 180 degrees
+        covered = []
+        for begin, size in wedges[vertex]:
+            if begin + size > 2 * pi:
+                covered += [(begin, 2 * pi), (0, begin + size - 2 * pi)]
+            else:
+                covered.append((begin, begin + size))
+        covered.sort()
+
+        gaps = []
+        reached = 0
+        for begin, end in covered:
+            if begin > reached + 1e-9:
+                gaps.append(begin - reached)
+            reached = max(reached, end)
+        if reached < 2 * pi - 1e-9:
+            if covered[0][0] > 1e-9:
+                # the last gap wraps around 0 into the first one
+                gaps[0] += 2 * pi - reached
+            else:
+                gaps.append(2 * pi - reached)
+
+        return len(gaps) > 1 or (len(gaps) == 1 and gaps[0] > pi + 1e-9)
+
+    corners = defaultdict(list)
+    for vertex, shape, prev, nxt in found:
+        if len(wedges[vertex]) > 1 and not is_outward(vertex):
+            continue
+        corners[vertex].append((shape, prev, nxt))
+    return dict(corners)
+
+
+def is_tangent(point: Point, corner: Point, prev: Point, nxt: Point) -> bool:
+    """Returns True if the line from point to corner only grazes the corner, i.e. both of the corner's edges lie on the same side of it."""
+
+    return turn(point, corner, prev) * turn(point, corner, nxt) >= 0
+
+
+def do_thing(arena, goal, start, ui: Optional["UI"] = None, planner: str = "ara", log: Optional["SearchLog"] = None):
+    """Plans from start to goal through the arena.
+    Every solution is drawn on the UI, or printed if ui is None.
+    The planner is either "ara" (on neighbors_grid) or "theta" (Lazy Theta* on the occupancy grid).
+    If log is given, the arena and the search are written to it so replay.py can show them later.
+    """
 
-    arena_lines = [line for shape in arena for line in shape.lines]
+    # ui.add("blue lines = searched paths; red line = current path; green line = complete path;",
+    #       coord=ui.dimensions().upper_left, align="left")
+
+    # only arena_neighbors needs these, so they are built on its first call instead of slowing down the grid planners
+    arena_points = defaultdict(list)
+    arena_lines = []
+    corners = None
 
     def arena_neighbors(point: Point):
-        candidates = {Point(*goal)}
+        """Returns the goal and the arena corners visible from a point.
+        The candidates are pruned before the visibility test: only convex corners the line from the point grazes are kept,
+        and of several corners in exactly the same direction only the nearest. This is not an angular sweep;
+        every remaining candidate is still tested against every arena line (with a bounding box check first).
+        """
+
+        nonlocal arena_lines, corners
+        if corners is None:
+            for shape in arena:
+                for i, line in enumerate(shape.lines):
+                    arena_points[line.point1].append((shape, shape.lines[i - 1].point1, line.point2))
+            arena_lines = [line for shape in arena for line in shape.lines]
+            corners = convex_corners(arena)
 
-        if point in arena_points:
-            sha, p1, p2 = arena_points[point]
-            candidates |= {p1, p2}
-        else:
-            sha = None
+        candidates = {Point(*goal)}
 
-        for shape in arena:
-            if shape == sha:
+        # the shapes the point is a vertex of, whose neighboring vertices are reachable along their edges
+        own = arena_points.get(point, [])
+        own_shapes = [shape for shape, _, _ in own]
+        for _, p1, p2 in own:
+            candidates |= {p for p in (p1, p2) if p in corners}
+
+        # only corners the path can wrap around are worth visiting
+        # if several lie in the same direction, the nearest one hides the rest
+        nearest = {}
+        for corner, sides in corners.items():
+            if corner == point or not any(shape not in own_shapes and is_tangent(point, corner, prev, nxt) for shape, prev, nxt in sides):
                 continue
-            candidates |= set(shape.points)
+            angle = atan2(corner.y - point.y, corner.x - point.x)
+            dist = (corner.x - point.x) ** 2 + (corner.y - point.y) ** 2
+            if angle not in nearest or dist < nearest[angle][0]:
+                nearest[angle] = (dist, corner)
+        candidates |= {corner for _, corner in nearest.values()}
 
         for cand in list(candidates):
             l = Line(point, cand)
-            if any(should_try_intersect(l, x) and l.intersects(x) and l.point_of_intersection(
-                    x) != l.point1 and l.point_of_intersection(x) != l.point2
-                   for
-                   x in arena_lines):
+            if any(should_try_intersect(l, x) and obstructs(point, cand, x.point1, x.point2) for x in arena_lines):
                 candidates.remove(cand)
 
         return candidates
 
+    def solutions(callback=None):
+        if planner == "theta":
+            # Lazy Theta* works on cell indices and checks line of sight between cell centers,
+            # so everything it reports is moved to the centers before it is drawn next to the Rects
+            def center(cell: Point) -> Point:
+                return cell + (0.5, 0.5)
+
+            def on_expand(parent: Point, cell: Point):
+                if callback:
+                    callback(center(parent), center(cell))
+                if log is not None:
+                    log.expand(center(parent), center(cell))
+
+            # the goal is the top-right corner of the arena
+            path = lazy_theta_star(Point(int(start.x), int(start.y)), goal, points, (int(goal.x), int(goal.y)), callback=on_expand)
+            if path is None:
+                return []
+            path = Path([center(p) for p in path], path.cost)
+            if log is not None:
+                log.solution(path)
+            return [path]
+        return ara(
+            conv_coord(start),
+            conv_coord(goal),
+            # arena_neighbors,
+            # lambda point: neighbors_free_space(ui_lines, 1, point, False),
+            neighbors_grid,
+            euclidean,
+            [100, 20, 2, 1],
+            # manhattan.to(goal),
+            euclidean.to(goal),
+            callback,
+            #        max_cost
+            log=log,
+        )
+
+    if log is not None:
+        log.endpoints(start, goal)
+        for obj in arena:
+            log.obstacle(obj)
+
+    if ui is None:
+        began = time.perf_counter()
+        for path in solutions():
+            print(f"cost {path.cost:.3f}, {len(path)} points, {time.perf_counter() - began:.3f}s")
+        return
+
     for obj in arena:
         ui.add(obj, width=1, color=(0, 0, 0))
 
@@ -100,45 +239,48 @@ def do_thing(arena, goal, start):
         ui.add(Line(p1, p2), width=3, color=(200, 150, 20))
         # time.sleep(0.25)
 
-    for path, color in zip(ara(
-            conv_coord(start),
-            conv_coord(goal),
-            # arena_neighbors,
-            # lambda point: neighbors_free_space(ui_lines, 1, point, False),
-            neighbors_grid,
-            distance,
-            [100, 20, 2, 1],
-            # lambda point: abs(point.x - goal.x) + abs(point.y - goal.y),
-            lambda point: distance(point, goal),
-            draw_path,
-            #        max_cost
-    ), [(200, 20, 20), (20, 200, 20), (20, 20, 200), (200, 20, 255)]):
-        res_list = list(path)
-        res_lines = [Line(x, y) for x, y in zip(res_list[:-1], res_list[1:])]
-
-        for line in res_lines:
-            ui.add(line, width=6, color=color)
+    for path, color in zip(solutions(draw_path), [(200, 20, 20), (20, 200, 20), (20, 20, 200), (200, 20, 255)]):
+        for p1, p2 in path.turning_points().edges():
+            ui.add(Line(p1, p2), width=6, color=color)
         time.sleep(1)
 
 
-if len(sys.argv) < 3:
-    print(f"Usage: {sys.argv[0]} [environment size - 100|200|300] [fill percent - 10|20|30]")
-    sys.exit(0)
+points = set()
 
-env_size = int(sys.argv[1])
-env_fill = float(sys.argv[2]) / 100
 
-ui = UI()
+def neighbors_grid(p: Point):
+    return {Point(int(p.x), int(p.y)), Point(int(p.x), int(p.y + 1)), Point(int(p.x + 1), int(p.y)), Point(int(p.x + 1), int(p.y + 1))} - points
+
 
-points = set(random.sample(list(itertools.product(range(env_size), repeat=2)), k=int(env_size ** 2 * env_fill)))
-arena = [Rect(p, (p[0] + 1, p[1] + 1)) for p in points]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("env_size", type=int, help="environment size - 100|200|300")
+    parser.add_argument("env_fill", type=float, help="fill percent - 10|20|30")
+    parser.add_argument("--no-ui", action="store_true", help="plan without opening a window and print each solution")
+    parser.add_argument("--planner", choices=["ara", "theta"], default="ara", help="ARA* on the grid, or Lazy Theta* for any-angle paths")
+    parser.add_argument("--log", help="write the search to this file, to be watched with replay.py")
+    args = parser.parse_args()
 
+    env_size = args.env_size
+    env_fill = args.env_fill / 100
 
-def neighbors_grid(p: Point):
-    return {Point(int(p.x), int(p.y)), Point(int(p.x), int(p.y + 1)), Point(int(p.x + 1), int(p.y)), Point(int(p.x + 1), int(p.y + 1))} - points
+    if args.no_ui:
+        ui = None
+    else:
+        from ui import UI
+        ui = UI()
 
+    points = set(random.sample(list(itertools.product(range(env_size), repeat=2)), k=int(env_size ** 2 * env_fill)))
+    points.discard((0, 0))
+    arena = [Rect(p, (p[0] + 1, p[1] + 1)) for p in points]
 
-do_thing(arena, Point(env_size, env_size), Point(0.5, 0.5))
+    if args.log is not None:
+        from eventlog import SearchLog
+        with SearchLog(args.log) as log:
+            do_thing(arena, Point(env_size, env_size), Point(0.5, 0.5), ui, args.planner, log)
+    else:
+        do_thing(arena, Point(env_size, env_size), Point(0.5, 0.5), ui, args.planner)
 
-ui.done()
-# time.sleep(3)
+    if ui is not None:
+        ui.done()
+    # time.sleep(3)
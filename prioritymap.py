@@ -38,6 +38,13 @@ class prioritymap:
         self.__dict.pop(key)
         return key, val
 
+    def head(self, n: int) -> Iterable[TVal]:
+        """Yields the values of up to n keys at the front of the heap.
+        The first is the minimum. The rest are close to the minimum but are not in order."""
+
+        for key in self.__heap[:n]:
+            yield self.__dict[key]
+
     def items(self) -> Iterable[Tuple[TKey, TVal]]:
         for key in self.__heap:
             yield key, self.__dict[key]
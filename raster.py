@@ -0,0 +1,204 @@
+import numpy as np
+from geometry import Coord, conv_coord, Number, Point, Rect, Shape
+from math import ceil, floor
+from typing import Iterable, List, Optional, Set, Tuple, Union
+
+
+class OccupancyGrid:
+    """A bitmap of blocked cells covering a rectangle of the world.
+    Cell (x, y) covers the world square from origin + (x, y) * resolution to origin + (x + 1, y + 1) * resolution.
+
+    An OccupancyGrid can be used anywhere a set of blocked (x, y) cells is expected, e.g. lazy_theta_star or line_of_sight,
+    and neighbors() can be passed to a_star or ara.
+
+    Attributes:
+        cells (np.ndarray): A boolean array indexed [y, x], True where blocked.
+        origin (Point): The world coordinate of the lower left corner of cell (0, 0).
+        resolution (Number): The width and height of a cell in world units.
+        width (int): The number of cells along x.
+        height (int): The number of cells along y.
+    """
+
+    def __init__(self, cells: np.ndarray, origin: Coord, resolution: Number):
+        """
+        Args:
+            cells (np.ndarray): A boolean array indexed [y, x], True where blocked.
+            origin (Coord): The world coordinate of the lower left corner of cell (0, 0).
+            resolution (Number): The width and height of a cell in world units.
+        """
+
+        self.cells = cells
+        self.origin = conv_coord(origin)
+        self.resolution = resolution
+        self.height, self.width = cells.shape
+
+    def __contains__(self, cell: Coord) -> bool:
+        """Returns True if an (x, y) cell is blocked or outside the grid, so the grid can stand in for a set of blocked cells."""
+
+        x, y = int(cell[0]), int(cell[1])
+        return not (0 <= x < self.width and 0 <= y < self.height) or bool(self.cells[y, x])
+
+    def neighbors(self, p: Point, diagonals: bool = True) -> List[Point]:
+        """Returns the open cells next to a cell.
+        Diagonal moves are only allowed when both cells beside them are open.
+
+        Args:
+            p (Point): The cell.
+            diagonals (bool): True for 8-connected moves, False for 4-connected.
+        """
+
+        x, y = int(p.x), int(p.y)
+        open_x = [dx for dx in (-1, 1) if (x + dx, y) not in self]
+        open_y = [dy for dy in (-1, 1) if (x, y + dy) not in self]
+        result = [Point(x + dx, y) for dx in open_x] + [Point(x, y + dy) for dy in open_y]
+        if diagonals:
+            result += [Point(x + dx, y + dy) for dx in open_x for dy in open_y if (x + dx, y + dy) not in self]
+        return result
+
+    def to_cell(self, coord: Coord) -> Tuple[int, int]:
+        """Returns the (x, y) cell containing a world coordinate."""
+
+        point = conv_coord(coord)
+        return floor((point.x - self.origin.x) / self.resolution), floor((point.y - self.origin.y) / self.resolution)
+
+    def to_world(self, cell: Coord) -> Point:
+        """Returns the world coordinate of the center of a cell."""
+
+        return Point(self.origin.x + (cell[0] + 0.5) * self.resolution, self.origin.y + (cell[1] + 0.5) * self.resolution)
+
+    def blocked_cells(self) -> Set[Tuple[int, int]]:
+        """Returns the blocked cells as a set of (x, y), like the points set in main.py."""
+
+        ys, xs = np.nonzero(self.cells)
+        return set(zip(xs.tolist(), ys.tolist()))
+
+
+def _fill_spans(cells: np.ndarray, rows: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> None:
+    # sets cells[row, start:end] for every span at once with a difference array
+    height, width = cells.shape
+    starts = np.clip(starts, 0, width)
+    ends = np.clip(ends, 0, width)
+    keep = (rows >= 0) & (rows < height) & (starts < ends)
+    rows, starts, ends = rows[keep], starts[keep], ends[keep]
+
+    diff = np.zeros((height, width + 1), dtype=np.int32)
+    np.add.at(diff, (rows, starts), 1)
+    np.add.at(diff, (rows, ends), -1)
+    cells |= np.cumsum(diff, axis=1)[:, :width] > 0
+
+
+def _interior(cells: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> None:
+    # marks the cells whose centers are inside the polygon (even-odd rule), one scanline per row
+    x1, y1 = xs, ys
+    x2, y2 = np.roll(xs, -1), np.roll(ys, -1)
+
+    first = max(floor(ys.min()), 0)
+    last = min(ceil(ys.max()), cells.shape[0])
+    if first >= last:
+        return
+    rows = np.arange(first, last)
+    yc = rows[:, None] + 0.5
+
+    crosses = (y1 <= yc) != (y2 <= yc)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_at = x1 + (yc - y1) * (x2 - x1) / (y2 - y1)
+    x_at = np.sort(np.where(crosses, x_at, np.inf), axis=1)
+
+    # crossings pair up left to right into spans; a cell is filled if its center is in [left, right)
+    left, right = x_at[:, 0::2], x_at[:, 1::2]
+    pairs = min(left.shape[1], right.shape[1])
+    left, right = left[:, :pairs], right[:, :pairs]
+    valid = np.isfinite(left) & np.isfinite(right)
+    span_rows = np.broadcast_to(rows[:, None], left.shape)[valid]
+    _fill_spans(cells, span_rows, np.ceil(left[valid] - 0.5).astype(np.int64), np.ceil(right[valid] - 0.5).astype(np.int64))
+
+
+def _boundary(cells: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> None:
+    # marks every cell whose inside the polygon's edges pass through (supercover), one edge at a time
+    all_rows, all_starts, all_ends = [], [], []
+    for i in range(len(xs)):
+        ax, ay, bx, by = xs[i], ys[i], xs[(i + 1) % len(xs)], ys[(i + 1) % len(xs)]
+        ymin, ymax = min(ay, by), max(ay, by)
+        rows = np.arange(floor(ymin), max(ceil(ymax), floor(ymin) + 1))
+
+        # the piece of the edge inside each row
+        lo = np.maximum(rows, ymin)
+        hi = np.minimum(rows + 1, ymax)
+        if ay == by:
+            xa, xb = np.full(len(rows), min(ax, bx)), np.full(len(rows), max(ax, bx))
+            if ay == floor(ay):
+                # lies on a row boundary, so it is inside no cell
+                continue
+        else:
+            x_lo = ax + (lo - ay) * (bx - ax) / (by - ay)
+            x_hi = ax + (hi - ay) * (bx - ax) / (by - ay)
+            xa, xb = np.minimum(x_lo, x_hi), np.maximum(x_lo, x_hi)
+
+        # cells c with c < xb and c + 1 > xa; empty when the piece is a single point on a column boundary
+        all_rows.append(rows)
+        all_starts.append(np.floor(xa).astype(np.int64))
+        all_ends.append(np.ceil(xb).astype(np.int64))
+
+    if len(all_rows) > 0:
+        _fill_spans(cells, np.concatenate(all_rows), np.concatenate(all_starts), np.concatenate(all_ends))
+
+
+def _inflate(cells: np.ndarray, radius: Number) -> np.ndarray:
+    # blocks every cell closer than radius (in cells) to a blocked cell
+    reach = ceil(radius)
+    out = cells.copy()
+    height, width = cells.shape
+    for dy in range(-reach, reach + 1):
+        for dx in range(-reach, reach + 1):
+            if (dx == 0 and dy == 0) or max(abs(dx) - 1, 0) ** 2 + max(abs(dy) - 1, 0) ** 2 >= radius ** 2:
+                continue
+            out[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)] |= \
+                cells[max(-dy, 0):height + min(-dy, 0), max(-dx, 0):width + min(-dx, 0)]
+    return out
+
+
+def rasterize(shapes: Iterable[Union[Shape, Rect]],
+              resolution: Number = 1,
+              bounds: Optional[Rect] = None,
+              radius: Number = 0) -> OccupancyGrid:
+    """Converts a list of Shapes and Rects into an OccupancyGrid, so polygonal arenas can use the grid planners.
+    The result is conservative: a cell is blocked if any part of its inside overlaps a shape, not just its center.
+    Cells that only touch a shape along their border stay open, so Rects on the cell grid block exactly the cells they cover.
+
+    Args:
+        shapes (Iterable[Union[Shape, Rect]]): The obstacles.
+
+        resolution (Number): The width and height of a cell in world units.
+
+        bounds (Optional[Rect]): The region to rasterize, or None to use the bounding box of the shapes. Required if there are no shapes.
+
+        radius (Number):
+            The radius of the agent in world units.
+            Every cell closer than this to a blocked cell is blocked too, so the planner can treat the agent as a point.
+
+    Returns:
+        The OccupancyGrid.
+    """
+
+    shapes = list(shapes)
+    if bounds is None:
+        if len(shapes) == 0:
+            raise Exception("Cannot find the bounds of an empty arena; pass bounds to rasterize it.")
+        points = [line.point1 for shape in shapes for line in shape.lines]
+        bounds = Rect((min(p.x for p in points), min(p.y for p in points)), (max(p.x for p in points), max(p.y for p in points)))
+
+    origin = bounds.lower_left
+    width = max(ceil(bounds.width / resolution), 1)
+    height = max(ceil(bounds.height / resolution), 1)
+    cells = np.zeros((height, width), dtype=bool)
+
+    for shape in shapes:
+        # vertices in drawing order, in cell units
+        xs = np.array([(line.point1.x - origin.x) / resolution for line in shape.lines], dtype=float)
+        ys = np.array([(line.point1.y - origin.y) / resolution for line in shape.lines], dtype=float)
+        _interior(cells, xs, ys)
+        _boundary(cells, xs, ys)
+
+    if radius > 0:
+        cells = _inflate(cells, radius / resolution)
+    return OccupancyGrid(cells, origin, resolution)
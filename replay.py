@@ -0,0 +1,131 @@
+from algorithms import Path
+from eventlog import ENDPOINTS, EXPAND, LINE, POINT, RECT, SOLUTION, read_events
+from geometry import Line, Number, Point, Rect
+from typing import List, Optional, Tuple
+from ui import UI
+import argparse
+import os
+import pygame
+
+# the same colors main.py draws with
+SOLUTION_COLORS = [(200, 20, 20), (20, 200, 20), (20, 20, 200), (200, 20, 255)]
+EXPAND_COLOR = (200, 150, 20)
+
+
+def log_bounds(file: str) -> Rect:
+    """Returns the rectangle containing every point recorded in a log."""
+
+    xs, ys = [], []
+    for kind, a, b, c, d in read_events(file):
+        if kind == POINT:
+            xs.append(a)
+            ys.append(b)
+        elif kind != SOLUTION:
+            xs += (a, c)
+            ys += (b, d)
+    if len(xs) == 0:
+        raise Exception(f"{file} has nothing to draw.")
+    return Rect((min(xs), min(ys)), (max(xs), max(ys)))
+
+
+def cross(center: Point, leg_len: Number) -> List[Line]:
+    return [
+        Line((center.x + leg_len, center.y + leg_len), (center.x - leg_len, center.y - leg_len)),
+        Line((center.x + leg_len, center.y - leg_len), (center.x - leg_len, center.y + leg_len))
+    ]
+
+
+def replay(file: str, ui: UI, per_frame: int = 100, fps: Number = 60, frames: Optional[str] = None) -> int:
+    """Draws a search recorded by a SearchLog onto a UI, the way main.py draws a live search.
+    The obstacles are drawn first, then per_frame expansions at a time, and every solution gets a frame of its own.
+
+    Args:
+        file (str): The path of the log.
+
+        ui (UI): The UI to draw on. It should not have been rendered yet.
+
+        per_frame (int): How many expansions to draw per frame.
+
+        fps (Number): The most frames to show per second, or 0 to show them as fast as they can be drawn. Ignored when saving frames.
+
+        frames (Optional[str]):
+            A directory to save every frame to as a numbered .png, or None to show the frames in the UI's window.
+
+    Returns:
+        The number of frames drawn, or fewer if the window was closed early.
+    """
+
+    ui.render(log_bounds(file))
+    clock = pygame.time.Clock()
+    frame = 0
+    pending = 0
+    solutions = 0
+    solution: Tuple[float, int, List[Point]] = (0, 0, [])
+
+    def show() -> bool:
+        # returns False if the window was closed
+        nonlocal frame, pending
+        if frames is not None:
+            ui.save(os.path.join(frames, f"frame{frame:06d}.png"))
+        else:
+            ui.update()
+            if any(event.type == pygame.QUIT for event in pygame.event.get()):
+                return False
+            if fps > 0:
+                clock.tick(fps)
+        frame += 1
+        pending = 0
+        return True
+
+    for kind, a, b, c, d in read_events(file):
+        if kind == EXPAND:
+            ui.add(Line((a, b), (c, d)), width=3, color=EXPAND_COLOR, update=False)
+            pending += 1
+            if pending >= per_frame and not show():
+                return frame
+        elif kind == LINE:
+            ui.add(Line((a, b), (c, d)), width=1, color=(0, 0, 0), update=False)
+        elif kind == RECT:
+            ui.add(Rect((a, b), (c, d)), width=1, color=(0, 0, 0), update=False)
+        elif kind == ENDPOINTS:
+            for line in cross(Point(c, d), 0.5):
+                ui.add(line, width=6, color=(20, 130, 20), update=False)
+            for line in cross(Point(a, b), 0.5):
+                ui.add(line, width=6, color=(130, 20, 20), update=False)
+        elif kind == SOLUTION:
+            solution = (a, int(b), [])
+        elif kind == POINT:
+            cost, length, points = solution
+            points.append(Point(a, b))
+            if len(points) == length:
+                color = SOLUTION_COLORS[solutions % len(SOLUTION_COLORS)]
+                for p1, p2 in Path(points, cost).turning_points().edges():
+                    ui.add(Line(p1, p2), width=6, color=color, update=False)
+                solutions += 1
+                if not show():
+                    return frame
+
+    if pending > 0 or frame == 0:
+        show()
+    return frame
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replays a search log written with main.py --log.")
+    parser.add_argument("log", help="the log file")
+    parser.add_argument("--per-frame", type=int, default=100, help="expansions drawn per frame")
+    parser.add_argument("--fps", type=float, default=60, help="frames per second, or 0 for as fast as possible")
+    parser.add_argument("--frames", help="save every frame as a .png in this directory instead of opening a window")
+    parser.add_argument("--size", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"), help="the image size in pixels")
+    args = parser.parse_args()
+
+    if args.frames is not None:
+        os.makedirs(args.frames, exist_ok=True)
+        ui = UI(tuple(args.size) if args.size else (800, 800), offscreen=True)
+    else:
+        ui = UI(tuple(args.size) if args.size else None)
+
+    count = replay(args.log, ui, args.per_frame, args.fps, args.frames)
+    print(f"{count} frames")
+    if args.frames is None:
+        ui.done()
@@ -0,0 +1,113 @@
+import numpy as np
+from algorithms import GoalHeuristic, Metric, octile
+from geometry import Coord, conv_coord, Number, Point
+from math import hypot
+from typing import List, Sequence
+
+
+class _Scaled(Metric):
+    """A metric multiplied by a constant factor."""
+
+    def __init__(self, metric: Metric, factor: Number):
+        self.metric = metric
+        self.factor = factor
+
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        return self.metric(p1, p2) * self.factor
+
+    def kernel(self, dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+        return self.metric.kernel(dx, dy) * self.factor
+
+
+class TerrainDistance:
+    """The cost of a step between two neighboring cells of a TerrainMap: its length times the average cost of the two cells.
+    Like a Metric, it has a batch() method that planners use to score all the neighbors of a cell at once.
+    """
+
+    def __init__(self, costs: np.ndarray):
+        self.__costs = costs
+
+    def __call__(self, p1: Point, p2: Point) -> Number:
+        c = self.__costs
+        return hypot(p1.x - p2.x, p1.y - p2.y) * (float(c[p1.y, p1.x]) + float(c[p2.y, p2.x])) / 2
+
+    def batch(self, origin: Point, points: Sequence[Point]) -> Sequence[Number]:
+        """Returns the cost of stepping from origin to each of the given cells, in order."""
+
+        xs = np.fromiter((p.x for p in points), dtype=np.int64, count=len(points))
+        ys = np.fromiter((p.y for p in points), dtype=np.int64, count=len(points))
+        c = self.__costs
+        step = np.hypot(xs - origin.x, ys - origin.y)
+        return (step * (c[ys, xs].astype(np.float64) + float(c[origin.y, origin.x])) / 2).tolist()
+
+
+class TerrainMap:
+    """A grid of cells with varying traversal costs, stored as a float32 array.
+    Cells with an infinite (or NaN) cost are impassable.
+
+    neighbors(), distance and heuristic() plug into a_star and ara.
+    The heuristic is the octile distance scaled by the cheapest cell, which never overestimates, so a_star still finds the cheapest path
+    and ara's solutions stay within its factors of it.
+
+    Attributes:
+        costs (np.ndarray): The cost of each cell, indexed [y, x].
+        width (int): The number of cells along x.
+        height (int): The number of cells along y.
+        min_cost (float): The cost of the cheapest passable cell.
+        distance (TerrainDistance): The get_distance function to plan with.
+    """
+
+    def __init__(self, costs: np.ndarray):
+        """
+        Args:
+            costs (np.ndarray): The cost of each cell, indexed [y, x]. Passable cells must cost more than 0.
+        """
+
+        costs = np.asarray(costs, dtype=np.float32)
+        self.costs = np.where(np.isnan(costs), np.float32(np.inf), costs)
+        self.height, self.width = self.costs.shape
+
+        passable = self.costs[np.isfinite(self.costs)]
+        if passable.size > 0 and passable.min() <= 0:
+            raise Exception("Terrain costs must be greater than 0, or the heuristic cannot be admissible.")
+        self.min_cost = float(passable.min()) if passable.size > 0 else 1.0
+        self.distance = TerrainDistance(self.costs)
+
+    def __contains__(self, cell: Coord) -> bool:
+        """Returns True if an (x, y) cell is impassable or outside the map, so the map can stand in for a set of blocked cells."""
+
+        x, y = int(cell[0]), int(cell[1])
+        return not (0 <= x < self.width and 0 <= y < self.height) or not np.isfinite(self.costs[y, x])
+
+    def neighbors(self, p: Point, diagonals: bool = True) -> List[Point]:
+        """Returns the passable cells next to a cell, found with one lookup of the 3x3 window around it.
+        Diagonal moves are only allowed when both cells beside them are passable.
+
+        Args:
+            p (Point): The cell.
+            diagonals (bool): True for 8-connected moves, False for 4-connected.
+        """
+
+        x, y = int(p.x), int(p.y)
+        x0, y0 = max(x - 1, 0), max(y - 1, 0)
+        window = np.isfinite(self.costs[y0:y + 2, x0:x + 2])
+
+        # pad to a full 3x3 window centered on the cell, with the outside of the map impassable
+        ok = np.zeros((3, 3), dtype=bool)
+        ok[y0 - y + 1:y0 - y + 1 + window.shape[0], x0 - x + 1:x0 - x + 1 + window.shape[1]] = window
+        ok[1, 1] = False
+        if diagonals:
+            ok[0, 0] &= ok[0, 1] & ok[1, 0]
+            ok[0, 2] &= ok[0, 1] & ok[1, 2]
+            ok[2, 0] &= ok[2, 1] & ok[1, 0]
+            ok[2, 2] &= ok[2, 1] & ok[1, 2]
+        else:
+            ok[0, 0] = ok[0, 2] = ok[2, 0] = ok[2, 2] = False
+
+        dys, dxs = np.nonzero(ok)
+        return [Point(x + dx - 1, y + dy - 1) for dx, dy in zip(dxs.tolist(), dys.tolist())]
+
+    def heuristic(self, goal: Coord) -> GoalHeuristic:
+        """Returns an admissible heuristic toward a goal: the octile distance times the cheapest cell cost."""
+
+        return GoalHeuristic(_Scaled(octile, self.min_cost), conv_coord(goal))
@@ -0,0 +1,48 @@
+import heapq
+import random
+from algorithms import a_star, euclidean
+from bounded import sma_star
+from geometry import Point
+
+SIZE = 12
+
+
+def grid(blocked):
+    def neighbors(p):
+        return [Point(p.x + dx, p.y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                if (dx or dy) and 0 <= p.x + dx < SIZE and 0 <= p.y + dy < SIZE and (p.x + dx, p.y + dy) not in blocked]
+
+    return neighbors
+
+
+def test_sma_star_stays_bounded_and_matches_a_star(monkeypatch):
+    goal = Point(SIZE - 1, SIZE - 1)
+    for seed in range(10):
+        rng = random.Random(seed)
+        blocked = {(x, y) for x in range(SIZE) for y in range(SIZE) if rng.random() < 0.2} - {(0, 0), tuple(goal)}
+        neighbors = grid(blocked)
+
+        expected = a_star(Point(0, 0), goal, neighbors, euclidean, euclidean.to(goal))
+        if expected is None:
+            # sma_star can take exponentially long to prove there is no path
+            continue
+
+        for max_nodes in (30, 1000):
+            # the longest either queue gets
+            longest = [0]
+            push = heapq.heappush
+
+            def heappush(heap, item):
+                push(heap, item)
+                longest[0] = max(longest[0], len(heap))
+
+            monkeypatch.setattr(heapq, "heappush", heappush)
+            stats = {}
+            path = sma_star(Point(0, 0), goal, neighbors, euclidean, euclidean.to(goal), max_nodes=max_nodes, stats=stats)
+            monkeypatch.undo()
+
+            assert path is not None
+            assert abs(path.cost - expected.cost) < 1e-9
+            # the points held plus both queues stay within a small multiple of the cap, however many expansions it takes
+            assert longest[0] <= 5 * max_nodes
+            assert stats["peak_nodes"] <= 8 * max_nodes
@@ -0,0 +1,64 @@
+import random
+from algorithms import a_star, flow_field, octile
+from geometry import Point
+
+SIZE = 20
+
+
+def corner_rule_grid(blocked):
+    # 8-connected moves that may not cut the corner of a blocked cell, like OccupancyGrid.neighbors
+    def free(x, y):
+        return 0 <= x < SIZE and 0 <= y < SIZE and (x, y) not in blocked
+
+    def neighbors(p):
+        x, y = p.x, p.y
+        open_x = [dx for dx in (-1, 1) if free(x + dx, y)]
+        open_y = [dy for dy in (-1, 1) if free(x, y + dy)]
+        result = [Point(x + dx, y) for dx in open_x] + [Point(x, y + dy) for dy in open_y]
+        return result + [Point(x + dx, y + dy) for dx in open_x for dy in open_y if free(x + dx, y + dy)]
+
+    return neighbors
+
+
+def check(field, neighbors, blocked, goal, rng):
+    fresh = flow_field(goal, neighbors, octile)
+    for x in range(SIZE):
+        for y in range(SIZE):
+            if (x, y) in blocked:
+                continue
+            start = Point(x, y)
+            assert field.cost(start) == fresh.cost(start) or abs(field.cost(start) - fresh.cost(start)) < 1e-9
+            path = field.path(start)
+            if path is not None:
+                # every step must still be a legal move
+                for p1, p2 in path.edges():
+                    assert p2 in neighbors(p1)
+
+    for _ in range(3):
+        start = Point(rng.randrange(SIZE), rng.randrange(SIZE))
+        if tuple(start) in blocked:
+            continue
+        expected = a_star(start, goal, neighbors, octile, octile.to(goal))
+        assert field.cost(start) == float("inf") if expected is None else abs(field.cost(start) - expected.cost) < 1e-9
+
+
+def test_block_and_unblock_match_a_star():
+    for seed in range(30):
+        rng = random.Random(seed)
+        blocked = {(x, y) for x in range(SIZE) for y in range(SIZE) if rng.random() < 0.25}
+        goal = Point(SIZE - 1, SIZE - 1)
+        blocked.discard(goal)
+        neighbors = corner_rule_grid(blocked)
+        field = flow_field(goal, neighbors, octile)
+
+        for _ in range(5):
+            cell = (rng.randrange(SIZE), rng.randrange(SIZE))
+            if cell == goal:
+                continue
+            if cell in blocked:
+                blocked.remove(cell)
+                field.unblock(cell)
+            else:
+                blocked.add(cell)
+                field.block(cell)
+            check(field, neighbors, blocked, goal, rng)
@@ -0,0 +1,174 @@
+import mmap
+import struct
+from collections import OrderedDict
+from geometry import Coord, Point
+from typing import Dict, Iterable, List, Tuple
+
+
+class TiledArena:
+    """An occupancy grid stored on disk in fixed-size square tiles and read through a memory map.
+    Only the tiles a search touches are paged in, and at most cache_tiles of them are kept in memory (least recently used first out),
+    so the memory used grows with the explored region instead of the map size.
+
+    A TiledArena can be used anywhere a set of blocked (x, y) cells is expected, e.g. lazy_theta_star or line_of_sight,
+    and neighbors() can be passed to a_star or ara.
+
+    The file is a header followed by every tile in row-major order. Each tile is tile_size * tile_size bytes, one per cell, nonzero if blocked.
+
+    Attributes:
+        width (int): The number of cells along x.
+        height (int): The number of cells along y.
+        tile_size (int): The number of cells along each side of a tile.
+        hits (int): The number of cell lookups whose tile was already cached.
+        misses (int): The number of cell lookups that had to read their tile from the file.
+        evictions (int): The number of tiles dropped from the cache to make room.
+    """
+
+    __header = struct.Struct("<4sIIII")
+    __magic = b"TILE"
+    __version = 1
+
+    def __init__(self, file: str, cache_tiles: int = 64, writable: bool = False):
+        """Opens an arena written by create().
+
+        Args:
+            file (str): The path of the arena file.
+            cache_tiles (int): The most tiles to keep in memory at once.
+            writable (bool): True to allow set_blocked(), False to open the file read-only.
+        """
+
+        self.__file = open(file, "r+b" if writable else "rb")
+        self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, version, self.width, self.height, self.tile_size = self.__header.unpack_from(self.__map, 0)
+        if magic != self.__magic or version != self.__version:
+            raise Exception(f"{file} is not a tiled arena.")
+
+        self.__tiles_x = -(-self.width // self.tile_size)
+        self.__tile_bytes = self.tile_size * self.tile_size
+        self.__cache_tiles = cache_tiles
+        self.__cache: "OrderedDict[int, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def create(cls,
+               file: str,
+               width: int,
+               height: int,
+               tile_size: int = 256,
+               blocked: Iterable[Coord] = (),
+               cache_tiles: int = 64) -> "TiledArena":
+        """Writes a new, fully open arena to a file and opens it for writing.
+        The file is sized up front; on most filesystems the untouched tiles take no disk space.
+
+        Args:
+            file (str): The path to write to. An existing file is overwritten.
+            width (int): The number of cells along x.
+            height (int): The number of cells along y.
+            tile_size (int): The number of cells along each side of a tile.
+            blocked (Iterable[Coord]): Cells to block, e.g. the points set in main.py. Every cell must be inside the arena.
+            cache_tiles (int): The most tiles to keep in memory at once.
+
+        Returns:
+            The arena.
+        """
+
+        tiles = -(-width // tile_size) * -(-height // tile_size)
+        with open(file, "wb") as f:
+            f.write(cls.__header.pack(cls.__magic, cls.__version, width, height, tile_size))
+            f.truncate(cls.__header.size + tiles * tile_size * tile_size)
+
+        arena = cls(file, cache_tiles, writable=True)
+        try:
+            for x, y in blocked:
+                arena.set_blocked(x, y)
+        except Exception:
+            arena.close()
+            raise
+        return arena
+
+    def __locate(self, x: int, y: int) -> Tuple[int, int]:
+        # (tile index, offset within the tile)
+        tx, ox = divmod(x, self.tile_size)
+        ty, oy = divmod(y, self.tile_size)
+        return ty * self.__tiles_x + tx, oy * self.tile_size + ox
+
+    def __tile(self, index: int) -> bytes:
+        tile = self.__cache.get(index)
+        if tile is not None:
+            self.hits += 1
+            self.__cache.move_to_end(index)
+            return tile
+
+        self.misses += 1
+        start = self.__header.size + index * self.__tile_bytes
+        tile = self.__map[start:start + self.__tile_bytes]
+        self.__cache[index] = tile
+        if len(self.__cache) > self.__cache_tiles:
+            self.__cache.popitem(last=False)
+            self.evictions += 1
+        return tile
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """Returns True if a cell is blocked or outside the arena, False if not."""
+
+        x, y = int(x), int(y)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return True
+        index, offset = self.__locate(x, y)
+        return self.__tile(index)[offset] != 0
+
+    def __contains__(self, cell: Coord) -> bool:
+        """Returns True if an (x, y) cell is blocked or outside the arena, so the arena can stand in for a set of blocked cells."""
+
+        x, y = cell
+        return self.is_blocked(x, y)
+
+    def set_blocked(self, x: int, y: int, blocked: bool = True) -> None:
+        """Blocks or unblocks a cell. The arena must have been opened as writable.
+        Raises an Exception if the cell is outside the arena.
+        """
+
+        x, y = int(x), int(y)
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise Exception(f"({x}, {y}) is outside the {self.width}x{self.height} arena.")
+        index, offset = self.__locate(x, y)
+        self.__map[self.__header.size + index * self.__tile_bytes + offset] = 1 if blocked else 0
+        self.__cache.pop(index, None)
+
+    def neighbors(self, p: Point, diagonals: bool = True) -> List[Point]:
+        """Returns the open cells next to a cell.
+        Diagonal moves are only allowed when both cells beside them are open.
+
+        Args:
+            p (Point): The cell.
+            diagonals (bool): True for 8-connected moves, False for 4-connected.
+        """
+
+        x, y = int(p.x), int(p.y)
+        open_x = [dx for dx in (-1, 1) if not self.is_blocked(x + dx, y)]
+        open_y = [dy for dy in (-1, 1) if not self.is_blocked(x, y + dy)]
+        result = [Point(x + dx, y) for dx in open_x] + [Point(x, y + dy) for dy in open_y]
+        if diagonals:
+            result += [Point(x + dx, y + dy) for dx in open_x for dy in open_y if not self.is_blocked(x + dx, y + dy)]
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        """Returns the tile cache statistics: hits, misses, evictions and the number of tiles currently cached."""
+
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "cached": len(self.__cache)}
+
+    def close(self) -> None:
+        """Closes the memory map and the file."""
+
+        self.__cache.clear()
+        self.__map.close()
+        self.__file.close()
+
+    def __enter__(self) -> "TiledArena":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()